@@ -0,0 +1,174 @@
+import heapq
+import numpy as np
+from GridGraph import index_dtype, octile_heuristic
+
+
+# Cells of the straight line from a to b, one per step along the major axis,
+# so consecutive cells are 8-neighbours and the line is itself a grid path.
+# The minor axis offset after t of n steps is floor(t * d / n + 1/2).
+def line_cells(a, b):
+    (r0, c0), (r1, c1) = a, b
+    dr, dc = r1 - r0, c1 - c0
+    n = max(abs(dr), abs(dc))
+    if n == 0:
+        return np.array([r0]), np.array([c0])
+    t = np.arange(n + 1)
+    return r0 + (2 * t * dr + n) // (2 * n), c0 + (2 * t * dc + n) // (2 * n)
+
+
+# Cost of travelling the straight segment a -> b under the grid cost model
+# (each entered cell's weight times the hv or diagonal multiplier), inf when
+# the line crosses a blocked cell
+def segment_cost(graph, a, b):
+    rows, cols = line_cells(a, b)
+    cells = rows * graph.cols + cols
+    if graph.blocked is not None and graph.blocked[cells].any():
+        return float('inf')
+    diagonal = (np.diff(rows) != 0) & (np.diff(cols) != 0)
+    multipliers = np.where(diagonal, graph.diag_multiplier, graph.hv_multiplier)
+    return float((graph.flat[cells[1:]] * multipliers).sum())
+
+
+# Same line walked cell by cell, giving up as soon as the cost exceeds bound;
+# Theta* tests short lines far more often than long ones, where numpy's
+# per-call overhead would dominate
+def _segment_cost_within(graph, u, v, bound):
+    cols, flat, blocked = graph.cols, graph.flat, graph.blocked
+    (r0, c0), (r1, c1) = divmod(u, cols), divmod(v, cols)
+    dr, dc = r1 - r0, c1 - c0
+    n = max(abs(dr), abs(dc))
+    cost = 0
+    r, c = r0, c0
+    for t in range(1, n + 1):
+        nr, nc = r0 + (2 * t * dr + n) // (2 * n), c0 + (2 * t * dc + n) // (2 * n)
+        index = nr * cols + nc
+        if blocked is not None and blocked.item(index):
+            return float('inf')
+        cost += flat.item(index) * (graph.diag_multiplier if nr != r and nc != c else graph.hv_multiplier)
+        if cost > bound:
+            return float('inf')
+        r, c = nr, nc
+    return cost
+
+
+# Full cell path through a list of waypoints, following line_cells between them
+def expand_waypoints(waypoints):
+    path = [tuple(waypoints[0])] if waypoints else []
+    for a, b in zip(waypoints, waypoints[1:]):
+        rows, cols = line_cells(a, b)
+        path.extend(zip(rows[1:].tolist(), cols[1:].tolist()))
+    return path
+
+
+# Replace runs of a grid path by straight segments wherever the straight line is
+# no more expensive than the cells it skips. From each waypoint the segment
+# costs to the next window cells of the path are computed in one array
+# operation; while the farthest of them still qualifies the look-ahead gallops
+# on over a window twice as wide (up to max_window), and the farthest
+# qualifying cell becomes the next waypoint. A waypoint so traces lines over
+# its look-ahead only, not to every later cell of the path. The result is
+# never longer than the input. Returns (length, waypoints).
+def smooth_path(graph, path, window=16, max_window=256):
+    if len(path) < 3:
+        return (graph.path_cost(path) if path else float('inf')), list(path)
+    points = np.array(path)
+    steps = np.array([graph.path_cost(path[i:i + 2]) for i in range(len(path) - 1)])
+    along = np.concatenate([[0.0], np.cumsum(steps)])
+    waypoints = [tuple(path[0])]
+    length = 0.0
+    i = 0
+    while i < len(path) - 1:
+        j, cost = i + 1, steps.item(i)
+        first, width = i + 2, window
+        while first < len(path):
+            candidates = np.arange(first, min(first + width, len(path)))
+            costs = _segment_costs_from(graph, points[i], points[candidates])
+            # Small tolerance so float rounding cannot reject an equal-cost line
+            ok = np.flatnonzero(costs <= (along[candidates] - along[i]) * (1 + 1e-12))
+            if not len(ok):
+                break
+            j, cost = candidates.item(ok[-1]), costs.item(ok[-1])
+            if ok[-1] != len(candidates) - 1:
+                break
+            first, width = candidates.item(-1) + 1, min(width * 2, max_window)
+        waypoints.append(tuple(path[j]))
+        length += cost
+        i = j
+    return length, waypoints
+
+
+# Costs of the straight segments from one cell to many, padded into a
+# (targets, steps) array so every line is traced at once
+def _segment_costs_from(graph, origin, targets):
+    d = targets - origin
+    n = np.abs(d).max(axis=1)
+    t = np.arange(n.max() + 1)
+    valid = t[None, :] <= n[:, None]
+    safe_n = np.maximum(n, 1)[:, None]
+    rows = origin[0] + (2 * t[None, :] * d[:, :1] + safe_n) // (2 * safe_n)
+    cols = origin[1] + (2 * t[None, :] * d[:, 1:] + safe_n) // (2 * safe_n)
+    rows, cols = np.where(valid, rows, origin[0]), np.where(valid, cols, origin[1])
+    cells = rows * graph.cols + cols
+    diagonal = (np.diff(rows, axis=1) != 0) & (np.diff(cols, axis=1) != 0)
+    multipliers = np.where(diagonal, graph.diag_multiplier, graph.hv_multiplier)
+    costs = np.where(valid[:, 1:], graph.flat[cells[:, 1:]] * multipliers, 0).sum(axis=1).astype(np.float64)
+    if graph.blocked is not None:
+        costs[(graph.blocked[cells] & valid).any(axis=1)] = np.inf
+    return costs
+
+
+# Theta*: A* in which a cell may take its grandparent as parent when the
+# straight line from there is cheaper than going through the expanded cell.
+# Line costs use the same cell model as segment_cost, so the result is never
+# longer than the optimal grid path and usually has a handful of waypoints.
+# Returns (length, waypoints).
+def theta_star_path(graph, start, end, stats=None):
+    rows, cols, flat = graph.rows, graph.cols, graph.flat
+    source, target = graph.index(start), graph.index(end)
+    heuristic = octile_heuristic(graph, target)
+    dist = np.zeros(graph.size, dtype=np.float64)
+    parent = np.zeros(graph.size, dtype=index_dtype(graph.size))
+    closed = graph.new_closed()
+    expanded = 0
+    found = False
+
+    if not closed.item(source) and not graph.is_blocked(target):
+        parent[source] = source + 1
+        heap = [(heuristic(source), 0, source)]
+        while heap:
+            _, d, u = heapq.heappop(heap)
+            if closed.item(u):
+                continue
+            closed[u] = True
+            expanded += 1
+            if u == target:
+                found = True
+                break
+            grandparent = parent.item(u) - 1
+            r, c = divmod(u, cols)
+            interior = 0 < r < rows - 1 and 0 < c < cols - 1
+            for dr, dc, offset, multiplier in graph.moves:
+                if not interior and not (0 <= r + dr < rows and 0 <= c + dc < cols):
+                    continue
+                v = u + offset
+                if closed.item(v):
+                    continue
+                nd, via = d + flat.item(v) * multiplier, u
+                # Ties go to the straight line (within float rounding): fewer waypoints
+                if grandparent != u:
+                    bound = nd * (1 + 1e-12)
+                    through = dist.item(grandparent) + _segment_cost_within(graph, grandparent, v, bound - dist.item(grandparent))
+                    if through <= bound:
+                        nd, via = through, grandparent
+                if parent.item(v) == 0 or nd < dist.item(v):
+                    dist[v] = nd
+                    parent[v] = via + 1
+                    heapq.heappush(heap, (nd + heuristic(v), nd, v))
+
+    if stats is not None:
+        stats['expanded'] = stats.get('expanded', 0) + expanded
+    if not found:
+        return float('inf'), []
+    waypoints = graph.path_from_parents(parent, source, target)
+    length = sum(segment_cost(graph, a, b) for a, b in zip(waypoints, waypoints[1:]))
+    return length, waypoints
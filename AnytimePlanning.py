@@ -0,0 +1,106 @@
+import heapq
+import time
+import numpy as np
+from GridGraph import index_dtype, octile_heuristic
+
+
+# Anytime Repairing A* (ARA*). The first search inflates the octile heuristic
+# by epsilon, which finds a path quickly that costs at most epsilon times the
+# optimum; epsilon is then lowered step by step, each search reusing the g
+# values of the previous one and only re-expanding cells whose cost improved.
+# Yields (length, path, bound) after every search, bound being the proven
+# suboptimality factor of that path (1.0 means optimal). Searches after the
+# first stop at the deadline (a time.perf_counter() value) without yielding.
+def ara_star(graph, start, end, deadline=None, epsilon=3.0, epsilon_step=0.5, stats=None):
+    rows, cols, flat = graph.rows, graph.cols, graph.flat
+    source, target = graph.index(start), graph.index(end)
+    if graph.is_blocked(source) or graph.is_blocked(target):
+        yield float('inf'), [], 1.0
+        return
+    heuristic = octile_heuristic(graph, target)
+    g = np.full(graph.size, np.inf)
+    parent = np.zeros(graph.size, dtype=index_dtype(graph.size))
+    blocked = graph.new_closed()
+    closed = blocked.copy()
+    in_open = np.zeros(graph.size, dtype=bool)
+    g[source] = 0
+    parent[source] = source + 1
+    in_open[source] = True
+    heap = [(epsilon * heuristic(source), source)]
+    inconsistent = []
+    expanded = 0
+    published = False
+
+    while True:
+        # Improve the path until no open cell can beat the goal at this epsilon
+        timed_out = False
+        while heap and heap[0][0] < g.item(target):
+            key, u = heapq.heappop(heap)
+            if not in_open.item(u) or key != g.item(u) + epsilon * heuristic(u):
+                continue
+            in_open[u] = False
+            closed[u] = True
+            expanded += 1
+            # The first search always finishes so there is something to return
+            if published and deadline is not None and expanded % 256 == 0 and time.perf_counter() > deadline:
+                timed_out = True
+                break
+            r, c = divmod(u, cols)
+            interior = 0 < r < rows - 1 and 0 < c < cols - 1
+            d = g.item(u)
+            for dr, dc, offset, multiplier in graph.moves:
+                if not interior and not (0 <= r + dr < rows and 0 <= c + dc < cols):
+                    continue
+                v = u + offset
+                if blocked.item(v):
+                    continue
+                nd = d + flat.item(v) * multiplier
+                if nd < g.item(v):
+                    g[v] = nd
+                    parent[v] = u + 1
+                    if closed.item(v):
+                        inconsistent.append(v)
+                    else:
+                        in_open[v] = True
+                        heapq.heappush(heap, (nd + epsilon * heuristic(v), v))
+
+        if stats is not None:
+            stats['expanded'] = stats.get('expanded', 0) + expanded
+        expanded = 0
+        if timed_out:
+            return
+        if g.item(target) == np.inf:
+            yield float('inf'), [], 1.0
+            return
+
+        # Proven bound: the goal cost over the best lower bound still waiting
+        pending = np.concatenate([np.flatnonzero(in_open), np.array(inconsistent, dtype=np.int64)])
+        lower = min((g.item(v) + heuristic(v) for v in pending.tolist()), default=np.inf)
+        if g.item(target) == 0:
+            bound = 1.0
+        else:
+            bound = max(1.0, min(epsilon, g.item(target) / lower if lower > 0 else epsilon))
+        path = graph.path_from_parents(parent, source, target)
+        published = True
+        yield graph.path_cost(path), path, bound
+        if bound <= 1.0 or (deadline is not None and time.perf_counter() > deadline):
+            return
+
+        # Next round: lower epsilon, reopen the inconsistent cells, forget CLOSED
+        epsilon = max(1.0, epsilon - epsilon_step)
+        for v in inconsistent:
+            in_open[v] = True
+        inconsistent = []
+        closed[:] = blocked
+        heap = [(g.item(v) + epsilon * heuristic(v), v) for v in np.flatnonzero(in_open).tolist()]
+        heapq.heapify(heap)
+
+
+# Best path found within time_budget seconds as (length, path, bound); the
+# first, epsilon-bounded path is always returned even if it takes longer
+def anytime_shortest_path(graph, start, end, time_budget, epsilon=3.0, epsilon_step=0.5, stats=None):
+    deadline = time.perf_counter() + time_budget
+    result = float('inf'), [], 1.0
+    for result in ara_star(graph, start, end, deadline, epsilon, epsilon_step, stats):
+        pass
+    return result
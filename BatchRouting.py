@@ -0,0 +1,93 @@
+import multiprocessing
+from collections import OrderedDict
+from multiprocessing import shared_memory
+import numpy as np
+from GridGraph import GridGraph, shortest_paths_from
+
+# Per-process state set up once by _init_worker
+_worker_graph = None
+_worker_memory = []
+
+
+# Read-only view of an array published by _share_array, or a memory-mapped .npy file
+def _attach_array(spec):
+    if isinstance(spec, str):
+        return np.load(spec, mmap_mode='r')
+    name, shape, dtype = spec
+    memory = shared_memory.SharedMemory(name=name)
+    _worker_memory.append(memory)
+    array = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+    array.flags.writeable = False
+    return array
+
+
+def _share_array(array, segments):
+    array = np.ascontiguousarray(array)
+    memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    segments.append(memory)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[...] = array
+    return memory.name, array.shape, array.dtype.str
+
+
+def _init_worker(grid_spec, blocked_spec, hv_multiplier, diag_multiplier, blocked_threshold):
+    global _worker_graph
+    weights = _attach_array(grid_spec)
+    blocked = None if blocked_spec is None else _attach_array(blocked_spec)
+    _worker_graph = GridGraph(weights, hv_multiplier, diag_multiplier, blocked, blocked_threshold)
+
+
+def _route_group(task):
+    start, indexed_ends, method = task
+    ends = [end for _, end in indexed_ends]
+    results = shortest_paths_from(_worker_graph, start, ends, method)
+    return [(i, result) for (i, _), result in zip(indexed_ends, results)]
+
+
+# Route thousands of (start, end) pairs across a pool of worker processes.
+# The cost grid is shared read-only: a .npy path is memory-mapped by every
+# worker, anything else is copied once into a shared memory block. Pairs are
+# grouped by start so each distinct start is one task, and results come back
+# as (length, path) in input order, the same as RoutingSession.route_many.
+def route_batch(grid, starts, ends, hv_multiplier=1, diag_multiplier=1, processes=None, method='dijkstra',
+                blocked=None, blocked_threshold=None, chunksize=1):
+    groups = OrderedDict()
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        groups.setdefault(tuple(start), []).append((i, tuple(end)))
+    tasks = [(start, indexed_ends, method) for start, indexed_ends in groups.items()]
+    results = [None] * sum(len(indexed_ends) for indexed_ends in groups.values())
+    if not tasks:
+        return results
+
+    segments = []
+    try:
+        grid_spec = grid if isinstance(grid, str) else _share_array(grid, segments)
+        blocked_spec = None if blocked is None else _share_array(np.asarray(blocked, dtype=bool), segments)
+        initargs = (grid_spec, blocked_spec, hv_multiplier, diag_multiplier, blocked_threshold)
+        with multiprocessing.Pool(processes, initializer=_init_worker, initargs=initargs) as pool:
+            for group in pool.imap_unordered(_route_group, tasks, chunksize):
+                for i, result in group:
+                    results[i] = result
+    finally:
+        for memory in segments:
+            memory.close()
+            memory.unlink()
+    return results
+
+
+# Example Usage
+if __name__ == "__main__":
+    import math
+    import random
+    import time
+
+    rng = random.Random(0)
+    grid = np.array([[rng.choice([2273, 3085, 3735, 5230, 7684, 11275]) for _ in range(300)] for _ in range(300)])
+    starts = [(rng.randrange(300), rng.randrange(300)) for _ in range(16)]
+    ends = [(rng.randrange(300), rng.randrange(300)) for _ in range(16)]
+    hv_multiplier = 100 / 1000
+    diag_multiplier = math.sqrt(2 * 100**2) / 1000
+
+    start_time = time.time()
+    results = route_batch(grid, starts, ends, hv_multiplier, diag_multiplier)
+    print(f"Total path length: {sum(length for length, _ in results)}")
+    print(f"Runtime: {time.time() - start_time} seconds")
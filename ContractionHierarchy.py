@@ -0,0 +1,329 @@
+import heapq
+import json
+import numpy as np
+from RoutingSession import grid_fingerprint
+
+
+# Contraction-hierarchy index over the weighted grid graph of a fixed cost grid
+# (the same directed edges as create_graph_from_grid: a move costs the weight of
+# the cell entered times the hv or diagonal multiplier). Preprocessing contracts
+# the open cells one by one in order of importance, adding shortcut edges where
+# the only cheapest route between two neighbours ran through the contracted
+# cell; queries then run an upward Dijkstra from each end that only climbs to
+# higher-ranked cells and settles about a hundred of them on a 100x100 grid.
+# Shortcuts remember the cell they bypass, so paths are unpacked back into grid
+# cells. The index is stored as flat arrays and saved to / loaded from one .npz.
+#
+# The build is pure Python and grows a little faster than the cell count: about
+# 2 s for 60x60, 5 s for 90x90 and 35 s for 200x200, so index a grid once and
+# load it afterwards. Median query times are 0.4 ms at 60x60, 0.7 ms at 90x90
+# and 3 ms at 200x200; queries repeated from one start take about half that.
+class ContractionHierarchy:
+    def __init__(self, graph, rank, up_offsets, up_targets, up_costs, up_middles,
+                 down_offsets, down_sources, down_costs, down_middles):
+        self.graph = graph
+        self.rank = rank
+        # Upward edges leaving each cell, in CSR form: the forward search graph
+        self.up = (up_offsets, up_targets, up_costs, up_middles)
+        # Edges entering each cell from higher-ranked cells: the backward search graph
+        self.down = (down_offsets, down_sources, down_costs, down_middles)
+        # The searches read per-cell (neighbour, cost) lists, and path unpacking
+        # the cell each shortcut (a, b) bypasses
+        self._up_edges = self._edge_lists(up_offsets, up_targets, up_costs)
+        self._down_edges = self._edge_lists(down_offsets, down_sources, down_costs)
+        self._middles = {}
+        for offsets, nodes, middles, upward in ((up_offsets, up_targets, up_middles, True),
+                                                (down_offsets, down_sources, down_middles, False)):
+            owners = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+            shortcut = middles >= 0
+            pairs = zip(owners[shortcut].tolist(), nodes[shortcut].tolist(), middles[shortcut].tolist())
+            for owner, node, middle in pairs:
+                self._middles[(owner, node) if upward else (node, owner)] = middle
+        # Upward search from the last source, reused while queries keep starting there
+        self._forward = None
+
+    @staticmethod
+    def _edge_lists(offsets, nodes, costs):
+        bounds = offsets.tolist()
+        nodes, costs = nodes.tolist(), costs.tolist()
+        return [list(zip(nodes[a:b], costs[a:b])) for a, b in zip(bounds, bounds[1:])]
+
+    # Build the index. Cells are contracted in order of a cheap importance
+    # estimate, re-evaluated when a cell is popped: the level it would sit at
+    # plus the neighbour pairs a two-hop check cannot rule out as shortcuts, per
+    # edge removed. Each cell is contracted once; only those candidate pairs get
+    # a witness search, limited to hop_limit edges and witness_limit settled
+    # cells. Smaller limits build faster but keep a few redundant shortcuts,
+    # which never affects correctness.
+    @classmethod
+    def build(cls, graph, witness_limit=80, hop_limit=6):
+        size = graph.size
+        open_cells = [index for index in range(size) if not graph.is_blocked(index)]
+        out_edges = [None] * size
+        in_edges = [None] * size
+        for u in open_cells:
+            out_edges[u] = {}
+            in_edges[u] = {}
+        for u in open_cells:
+            for v, cost in graph.neighbors(u):
+                out_edges[u][v] = (cost, -1)
+                in_edges[v][u] = (cost, -1)
+
+        level = [0] * size
+        heap = [(cls._importance(v, out_edges, in_edges, level)[0], v) for v in open_cells]
+        heapq.heapify(heap)
+        rank = np.full(size, -1, dtype=np.int64)
+        up_lists = [None] * size
+        down_lists = [None] * size
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            # Lazy update: contract v only if it is still the least important
+            importance, candidates = cls._importance(v, out_edges, in_edges, level)
+            if heap and importance > heap[0][0]:
+                heapq.heappush(heap, (importance, v))
+                continue
+
+            rank[v] = order
+            order += 1
+            up_lists[v] = [(w, cost, middle) for w, (cost, middle) in out_edges[v].items()]
+            down_lists[v] = [(u, cost, middle) for u, (cost, middle) in in_edges[v].items()]
+            for u, w, cost in cls._shortcuts(v, candidates, out_edges, witness_limit, hop_limit):
+                if cost < out_edges[u].get(w, (float('inf'),))[0]:
+                    out_edges[u][w] = (cost, v)
+                    in_edges[w][u] = (cost, v)
+            for w in out_edges[v]:
+                del in_edges[w][v]
+                level[w] = max(level[w], level[v] + 1)
+            for u in in_edges[v]:
+                del out_edges[u][v]
+                level[u] = max(level[u], level[v] + 1)
+            out_edges[v] = in_edges[v] = None
+
+        return cls(graph, rank, *cls._pack(up_lists, size), *cls._pack(down_lists, size))
+
+    # Flatten per-cell edge lists into CSR arrays
+    @staticmethod
+    def _pack(lists, size):
+        offsets = np.zeros(size + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(edges) if edges else 0 for edges in lists])
+        edges = [edge for edges in lists if edges for edge in edges]
+        nodes = np.array([node for node, _, _ in edges], dtype=np.int64)
+        costs = np.array([cost for _, cost, _ in edges], dtype=np.float64)
+        middles = np.array([middle for _, _, middle in edges], dtype=np.int64)
+        return offsets, nodes, costs, middles
+
+    # Neighbour pairs (u, w, cost via v) of v with no path of at most two edges
+    # avoiding v that is as cheap: the only pairs that may need a shortcut
+    @staticmethod
+    def _candidates(v, out_edges, in_edges):
+        candidates = []
+        outgoing = out_edges[v]
+        for u, (in_cost, _) in in_edges[v].items():
+            leaving = out_edges[u]
+            for w, (out_cost, _) in outgoing.items():
+                if w == u:
+                    continue
+                cost = in_cost + out_cost
+                direct = leaving.get(w)
+                if direct is not None and direct[0] <= cost:
+                    continue
+                for x, (first, _) in leaving.items():
+                    if x != v and first < cost:
+                        second = out_edges[x].get(w)
+                        if second is not None and first + second[0] <= cost:
+                            break
+                else:
+                    candidates.append((u, w, cost))
+        return candidates
+
+    # Shortcuts needed to contract v: candidate pairs whose cheapest connection
+    # without v, found by one hop- and size-limited witness search per source,
+    # is dearer than going through v
+    @staticmethod
+    def _shortcuts(v, candidates, out_edges, witness_limit, hop_limit):
+        by_source = {}
+        for u, w, cost in candidates:
+            by_source.setdefault(u, {})[w] = cost
+        shortcuts = []
+        for u, targets in by_source.items():
+            bound = max(targets.values())
+            remaining = len(targets)
+            dist = {u: 0}
+            hops = {u: 0}
+            heap = [(0, u)]
+            settled = 0
+            while heap and settled < witness_limit:
+                d, x = heapq.heappop(heap)
+                if d > dist[x]:
+                    continue
+                if d > bound:
+                    break
+                settled += 1
+                if x in targets:
+                    remaining -= 1
+                    if not remaining:
+                        break
+                hop = hops[x] + 1
+                if hop > hop_limit:
+                    continue
+                for y, (cost, _) in out_edges[x].items():
+                    nd = d + cost
+                    if nd <= bound and y != v and nd < dist.get(y, float('inf')):
+                        dist[y] = nd
+                        hops[y] = hop
+                        heapq.heappush(heap, (nd, y))
+            for w, cost in targets.items():
+                if dist.get(w, float('inf')) > cost:
+                    shortcuts.append((u, w, cost))
+        return shortcuts
+
+    # Level plus candidate shortcuts per removed edge: contract cells that add
+    # few shortcuts first, spread evenly over the grid so the hierarchy stays
+    # shallow. Returns the candidates too.
+    @classmethod
+    def _importance(cls, v, out_edges, in_edges, level):
+        candidates = cls._candidates(v, out_edges, in_edges)
+        removed = len(out_edges[v]) + len(in_edges[v])
+        return level[v] + 4 * len(candidates) / max(removed, 1), candidates
+
+    def _metadata(self):
+        graph = self.graph
+        return {
+            'grid_fingerprint': grid_fingerprint(graph.weights),
+            'blocked_fingerprint': None if graph.blocked is None else grid_fingerprint(graph.blocked),
+            'hv_multiplier': graph.hv_multiplier,
+            'diag_multiplier': graph.diag_multiplier,
+        }
+
+    def save(self, path):
+        up_offsets, up_targets, up_costs, up_middles = self.up
+        down_offsets, down_sources, down_costs, down_middles = self.down
+        np.savez(path, rank=self.rank, up_offsets=up_offsets, up_targets=up_targets, up_costs=up_costs,
+                 up_middles=up_middles, down_offsets=down_offsets, down_sources=down_sources,
+                 down_costs=down_costs, down_middles=down_middles, metadata=json.dumps(self._metadata()))
+
+    # Load an index saved for this graph; raises ValueError when it was built
+    # for another grid or cost model
+    @classmethod
+    def load(cls, graph, path):
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+        index = cls(graph, arrays['rank'], arrays['up_offsets'], arrays['up_targets'], arrays['up_costs'],
+                    arrays['up_middles'], arrays['down_offsets'], arrays['down_sources'], arrays['down_costs'],
+                    arrays['down_middles'])
+        if json.loads(arrays['metadata'].item()) != index._metadata():
+            raise ValueError(f"contraction hierarchy in {path} was built for a different grid or cost model")
+        return index
+
+    # Upward Dijkstra from source over edges (the per-cell lists of _up_edges or
+    # _down_edges), with stall-on-demand: a cell that a higher-ranked cell
+    # already reached reaches more cheaply, through an edge of back, is not
+    # expanded. Given the other side's distances it stops once no cheaper
+    # meeting point can follow, and returns (dist, parent, best, meeting, settled).
+    @staticmethod
+    def _upward(source, edges, back, other=None):
+        dist = {source: 0}
+        parent = {source: None}
+        heap = [(0, source)]
+        get = dist.get
+        best, meeting = float('inf'), None
+        settled = 0
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if d >= best:
+                break
+            for w, cost in back[u]:
+                dw = get(w)
+                if dw is not None and dw + cost < d:
+                    break
+            else:
+                settled += 1
+                if other is not None and u in other and d + other[u] < best:
+                    best, meeting = d + other[u], u
+                for w, cost in edges[u]:
+                    nd = d + cost
+                    if nd < get(w, float('inf')):
+                        dist[w] = nd
+                        parent[w] = u
+                        heapq.heappush(heap, (nd, w))
+        return dist, parent, best, meeting, settled
+
+    # Expand an edge of the hierarchy into the grid cells it stands for
+    def _unpack(self, a, b, cells):
+        middles = self._middles
+        stack = [(a, b)]
+        while stack:
+            a, b = stack.pop()
+            middle = middles.get((a, b), -1)
+            if middle < 0:
+                cells.append(b)
+            else:
+                # Second half is pushed first so the first half is expanded first
+                stack.append((middle, b))
+                stack.append((a, middle))
+
+    # Route start -> end: length and the unpacked cell path. Consecutive queries
+    # from the same start (one crane, many destinations) share its upward
+    # search. When a stats dict is passed the nodes settled by both searches
+    # are added under 'expanded'.
+    def route(self, start, end, stats=None):
+        graph = self.graph
+        source, target = graph.index(start), graph.index(end)
+        if graph.is_blocked(source) or graph.is_blocked(target):
+            return float('inf'), []
+        if self._forward is None or self._forward[0] != source:
+            self._forward = (source, *self._upward(source, self._up_edges, self._down_edges))
+        _, forward, forward_parent, _, _, settled = self._forward
+        _, backward_parent, best, meeting, backward_settled = self._upward(
+            target, self._down_edges, self._up_edges, forward)
+        if stats is not None:
+            stats['expanded'] = stats.get('expanded', 0) + settled + backward_settled
+        if meeting is None:
+            return float('inf'), []
+
+        # Hierarchy edges source -> meeting, then meeting -> target
+        chain = []
+        node = meeting
+        while forward_parent[node] is not None:
+            chain.append((forward_parent[node], node))
+            node = forward_parent[node]
+        chain.reverse()
+        node = meeting
+        while backward_parent[node] is not None:
+            chain.append((node, backward_parent[node]))
+            node = backward_parent[node]
+        cells = [source]
+        for a, b in chain:
+            self._unpack(a, b, cells)
+        path = [graph.cell(index) for index in cells]
+        return graph.path_cost(path), path
+
+
+# Example Usage
+if __name__ == "__main__":
+    import math
+    import os
+    import random
+    import tempfile
+    import time
+    from GridGraph import GridGraph, dijkstra_shortest_path
+
+    rng = random.Random(0)
+    grid = np.array([[rng.choice([2273, 3085, 3735, 5230, 7684, 11275]) for _ in range(80)] for _ in range(80)])
+    graph = GridGraph(grid, 100 / 1000, math.sqrt(2 * 100**2) / 1000)
+
+    start_time = time.time()
+    hierarchy = ContractionHierarchy.build(graph)
+    print(f"Preprocessing: {time.time() - start_time} seconds")
+    index_path = os.path.join(tempfile.mkdtemp(), 'yard.ch.npz')
+    hierarchy.save(index_path)
+    hierarchy = ContractionHierarchy.load(graph, index_path)
+
+    stats = {}
+    start_time = time.time()
+    length, path = hierarchy.route((2, 3), (77, 70), stats)
+    print(f"CH: length {length}, settled {stats['expanded']}, {(time.time() - start_time) * 1000} ms")
+    print(f"Dijkstra: length {dijkstra_shortest_path(graph, (2, 3), (77, 70))[0]}")
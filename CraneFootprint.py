@@ -0,0 +1,154 @@
+from collections import OrderedDict
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from RoutingSession import grid_fingerprint
+
+
+# Cell offsets (relative to the centre cell) whose extent overlaps the interval
+# [low, high] metres, the centre cell spanning [-cell_size / 2, cell_size / 2]
+def _covered_offsets(low, high, cell_size):
+    first = int(np.floor((low - cell_size / 2) / cell_size)) + 1
+    last = int(np.ceil((high + cell_size / 2) / cell_size)) - 1
+    return first, last
+
+
+# Footprint of a crawler crane centred on a cell as rectangles of cell offsets
+# (row_first, row_last, col_first, col_last). Each track is C wide and L_cl
+# long, the two tracks L_cr apart (inner edges), as in MatDesign1; tracks run
+# along the rows for orientation 'rows' and along the columns for 'cols'.
+def footprint_rectangles(C, L_cr, L_cl, cell_size, orientation='rows'):
+    half_width = C + L_cr / 2
+    row_first, row_last = _covered_offsets(-L_cl / 2, L_cl / 2, cell_size)
+    rectangles = []
+    for low, high in ((-half_width, -half_width + C), (half_width - C, half_width)):
+        col_first, col_last = _covered_offsets(low, high, cell_size)
+        rectangles.append((row_first, row_last, col_first, col_last))
+    # Tracks sharing cells become one rectangle, or sums would count those cells twice
+    if rectangles[0][3] >= rectangles[1][2]:
+        rectangles = [(row_first, row_last, rectangles[0][2], rectangles[1][3])]
+    if orientation == 'cols':
+        rectangles = [(c0, c1, r0, r1) for r0, r1, c0, c1 in rectangles]
+    return rectangles
+
+
+# Max or sum of padded[first + i : last + i + 1] along one axis for every i,
+# padded having been extended by pad cells on both sides of that axis
+def _window_reduce(padded, first, last, pad, axis, mode):
+    count = padded.shape[axis] - 2 * pad
+    span = np.take(padded, np.arange(pad + first, pad + last + count), axis=axis)
+    if mode == 'max':
+        return sliding_window_view(span, last - first + 1, axis=axis).max(axis=-1)
+    totals = np.cumsum(span, axis=axis)
+    totals = np.concatenate([np.zeros_like(np.take(totals, [0], axis=axis)), totals], axis=axis)
+    size = last - first + 1
+    return np.take(totals, np.arange(size, size + count), axis=axis) - np.take(totals, np.arange(count), axis=axis)
+
+
+def _rectangle_reduce(array, rectangle, pad, fill, mode):
+    padded = np.pad(array, pad, mode='constant', constant_values=fill) if fill is not None else np.pad(array, pad, mode='edge')
+    row_first, row_last, col_first, col_last = rectangle
+    rows = _window_reduce(padded, row_first, row_last, pad, 0, mode)
+    return _window_reduce(rows, col_first, col_last, pad, 1, mode)
+
+
+# Footprint-aware cost grid: the value at each cell is what it costs to stand
+# the whole crane centred there, taken over every cell under its tracks with
+# vectorized window filters. mode 'max' uses the worst cell under the tracks,
+# 'sum' the total ground cost they cover. orientation 'rows' or 'cols' fixes the
+# track direction; 'both' takes the worse of the two, for a crane that must be
+# able to turn anywhere on its route.
+# Returns (costs, blocked): a position is blocked when any covered cell is
+# blocked (mask, threshold or non-finite weight) or lies outside the grid, so
+# the pair can go straight into GridGraph(costs, hv, diag, blocked=blocked).
+# The costs can equally replace the grid passed to create_graph_from_grid.
+def crane_cost_grid(grid, C, L_cr, L_cl, cell_size, mode='max', orientation='both', blocked=None, blocked_threshold=None):
+    if mode not in ('max', 'sum'):
+        raise ValueError(f"unknown footprint mode {mode!r}, expected 'max' or 'sum'")
+    if orientation not in ('rows', 'cols', 'both'):
+        raise ValueError(f"unknown orientation {orientation!r}, expected 'rows', 'cols' or 'both'")
+    weights = np.asarray(grid)
+    mask = np.zeros(weights.shape, dtype=bool) if blocked is None else np.array(blocked, dtype=bool)
+    if blocked_threshold is not None:
+        mask |= weights >= blocked_threshold
+    if weights.dtype.kind == 'f':
+        mask |= ~np.isfinite(weights)
+    # Blocked cells are excluded by the mask, so keep their sentinels out of the sums
+    if mask.any():
+        weights = np.where(mask, 0, weights).astype(weights.dtype)
+
+    orientations = ('rows', 'cols') if orientation == 'both' else (orientation,)
+    costs, footprint_blocked = None, None
+    for direction in orientations:
+        rectangles = footprint_rectangles(C, L_cr, L_cl, cell_size, direction)
+        pad = max(abs(offset) for rectangle in rectangles for offset in rectangle)
+        cost, covered = None, None
+        for rectangle in rectangles:
+            part = _rectangle_reduce(weights, rectangle, pad, None, mode)
+            cost = part if cost is None else (np.maximum(cost, part) if mode == 'max' else cost + part)
+            hit = _rectangle_reduce(mask.view(np.uint8), rectangle, pad, 1, 'max').astype(bool)
+            covered = hit if covered is None else covered | hit
+        costs = cost if costs is None else np.maximum(costs, cost)
+        footprint_blocked = covered if footprint_blocked is None else footprint_blocked | covered
+    return costs, footprint_blocked
+
+
+# Cache of footprint cost grids, built once per grid version and crane model.
+# Keys combine the grid fingerprint with the crane parameters, so a changed
+# grid or a different crane builds a new entry; the oldest entries are evicted
+# past max_entries. Cached arrays are read-only since they are shared.
+class FootprintCache:
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.builds = 0
+        self.hits = 0
+
+    def costs_for(self, grid, C, L_cr, L_cl, cell_size, mode='max', orientation='both', blocked=None,
+                  blocked_threshold=None, fingerprint=None):
+        if fingerprint is None:
+            fingerprint = grid_fingerprint(grid)
+        mask_fingerprint = None if blocked is None else grid_fingerprint(np.asarray(blocked, dtype=bool))
+        key = (fingerprint, mask_fingerprint, blocked_threshold, C, L_cr, L_cl, cell_size, mode, orientation)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        costs, footprint_blocked = crane_cost_grid(grid, C, L_cr, L_cl, cell_size, mode, orientation, blocked,
+                                                   blocked_threshold)
+        costs.flags.writeable = False
+        footprint_blocked.flags.writeable = False
+        entry = self.entries[key] = (costs, footprint_blocked)
+        self.builds += 1
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self.entries.clear()
+
+
+# Example Usage
+if __name__ == "__main__":
+    import math
+    import random
+    import time
+    from GridGraph import GridGraph, shortest_path
+
+    rng = random.Random(0)
+    grid = np.array([[rng.choice([2273, 3085, 3735, 5230, 7684, 11275]) for _ in range(300)] for _ in range(300)])
+    grid[100:200, 140:160] = 1000000
+    # Crane parameters from MatDesign1, on 2 m cells
+    C, L_cr, L_cl = 1.5, 12, 12.570
+
+    cache = FootprintCache()
+    start_time = time.time()
+    costs, blocked = cache.costs_for(grid, C, L_cr, L_cl, 2, blocked_threshold=1000000)
+    print(f"Footprint preprocessing: {time.time() - start_time} seconds")
+    cache.costs_for(grid, C, L_cr, L_cl, 2, blocked_threshold=1000000)
+    print(f"Cache builds: {cache.builds}, hits: {cache.hits}")
+
+    graph = GridGraph(costs, 2 / 1000, math.sqrt(2 * 2**2) / 1000, blocked=blocked)
+    length, path = shortest_path(graph, (150, 20), (150, 280), 'astar')
+    print(f"Crane path length: {length} ({len(path)} cells)")
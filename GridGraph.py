@@ -0,0 +1,697 @@
+import heapq
+import math
+from fractions import Fraction
+import numpy as np
+
+# Neighbour moves as (row offset, column offset, diagonal flag). The position of
+# a move in this tuple is its direction code, ordered clockwise from north so
+# that neighbouring codes are 45 degrees apart.
+MOVES = (
+    (-1, 0, False),
+    (-1, 1, True),
+    (0, 1, False),
+    (1, 1, True),
+    (1, 0, False),
+    (1, -1, True),
+    (0, -1, False),
+    (-1, -1, True),
+)
+
+
+# Widest ratio of dearest to cheapest move for which Dijkstra picks the bucket
+# engine; measured on 300x300 grids, buckets are 2-4x faster up to about 8 and
+# slower beyond about 12
+BUCKET_SPAN_LIMIT = 10
+
+
+# Smallest integer dtype that can hold a flat cell index (plus one) for the grid
+def index_dtype(size):
+    return np.int32 if size < 2**31 - 1 else np.int64
+
+
+# Implicit 8-connected grid graph over a contiguous NumPy cost grid.
+# Moving from a cell into a neighbour costs the neighbour's weight times the
+# hv or diagonal multiplier, exactly like create_graph_from_grid, but edges are
+# generated on the fly from flat indices instead of being stored.
+#
+# Blocked cells (existing structures, excavations) are removed from the search
+# space entirely: pass an explicit boolean mask, a blocked_threshold at or above
+# which a weight counts as blocked (e.g. the 1000000 sentinel), or both.
+# Non-finite weights are always blocked.
+class GridGraph:
+    def __init__(self, grid, hv_multiplier=1, diag_multiplier=1, blocked=None, blocked_threshold=None):
+        self.weights = np.ascontiguousarray(grid)
+        if self.weights.ndim != 2:
+            raise ValueError("grid must be two-dimensional")
+        self.rows, self.cols = self.weights.shape
+        self.size = self.rows * self.cols
+        self.flat = self.weights.reshape(-1)
+        self.hv_multiplier = hv_multiplier
+        self.diag_multiplier = diag_multiplier
+        self.blocked_threshold = blocked_threshold
+        self.blocked = self._blocked_mask(blocked)
+        self.moves = [
+            (dr, dc, dr * self.cols + dc, diag_multiplier if diag else hv_multiplier)
+            for dr, dc, diag in MOVES
+        ]
+
+    # Flat boolean mask of blocked cells, or None when every cell is open
+    def _blocked_mask(self, blocked):
+        mask = None
+        if blocked is not None:
+            mask = np.asarray(blocked, dtype=bool)
+            if mask.shape != self.weights.shape:
+                raise ValueError(f"blocked mask shape {mask.shape} does not match grid shape {self.weights.shape}")
+            mask = mask.reshape(-1).copy()
+        if self.blocked_threshold is not None:
+            over = self.flat >= self.blocked_threshold
+            mask = over if mask is None else mask | over
+        if self.weights.dtype.kind == 'f':
+            infinite = ~np.isfinite(self.flat)
+            mask = infinite if mask is None else mask | infinite
+        if mask is not None and not mask.any():
+            return None
+        return mask
+
+    def is_blocked(self, index):
+        return self.blocked is not None and self.blocked.item(index)
+
+    # Weights of the cells a search can enter
+    def open_weights(self):
+        return self.flat if self.blocked is None else self.flat[~self.blocked]
+
+    # Cheapest weight any move can enter, the per-cell lower bound used by heuristics
+    @property
+    def min_weight(self):
+        if not hasattr(self, '_min_weight'):
+            weights = self.open_weights()
+            self._min_weight = max(weights.min().item(), 0) if weights.size else 0
+        return self._min_weight
+
+    @property
+    def max_weight(self):
+        if not hasattr(self, '_max_weight'):
+            weights = self.open_weights()
+            self._max_weight = weights.max().item() if weights.size else 0
+        return self._max_weight
+
+    # Fresh closed-set array for a search; blocked cells start out closed so the
+    # search never enters them
+    def new_closed(self):
+        if self.blocked is None:
+            return np.zeros(self.size, dtype=bool)
+        return self.blocked.copy()
+
+    # Moves with the multipliers scaled to a common integer factor, or None when
+    # the grid is not integral or a multiplier is not a short exact fraction
+    # (e.g. sqrt(2) / 10). Positive integral costs let Dijkstra run on a bucket queue.
+    @property
+    def integer_moves(self):
+        if not hasattr(self, '_integer_moves'):
+            self._integer_moves = None
+            multipliers = (self.hv_multiplier, self.diag_multiplier)
+            fractions = [Fraction(m).limit_denominator(10**6) for m in multipliers]
+            if (self.weights.dtype.kind in 'iub' and self.min_weight > 0
+                    and all(f > 0 and float(f) == m for f, m in zip(fractions, multipliers))):
+                scale = math.lcm(*(f.denominator for f in fractions))
+                hv, diag = (int(f * scale) for f in fractions)
+                self._integer_moves = [(dr, dc, offset, diag if dr and dc else hv) for dr, dc, offset, _ in self.moves]
+        return self._integer_moves
+
+    # Whether the bucket engine beats the heap search: settling a bucket costs a
+    # handful of array calls, which only pays off while buckets hold many cells,
+    # i.e. while the dearest move spans at most BUCKET_SPAN_LIMIT buckets of the
+    # cheapest one. Wide cost ranges (e.g. 1 to 20000, or blocked sentinels left
+    # in the weights) leave most buckets nearly empty and stay on the heap.
+    @property
+    def dense_buckets(self):
+        moves = self.integer_moves
+        if moves is None:
+            return False
+        multipliers = [m for *_, m in moves]
+        span = self.max_weight * max(multipliers) / (self.min_weight * min(multipliers))
+        return span <= BUCKET_SPAN_LIMIT
+
+    # Apply ((row, col), weight) changes in place. A weight of None, a non-finite
+    # weight or one at or above blocked_threshold closes the cell; any other
+    # weight opens it. Read-only (e.g. memory-mapped) grids are copied on the
+    # first change, and integral grids are promoted to float for fractional weights.
+    def update_weights(self, changes):
+        changes = [(self.index(cell), weight) for cell, weight in changes]
+        if not changes:
+            return
+        values = [float(weight) for _, weight in changes if weight is not None]
+        if self.weights.dtype.kind != 'f' and not all(value.is_integer() for value in values):
+            self.weights = self.weights.astype(np.float64)
+        elif not self.weights.flags.writeable:
+            self.weights = self.weights.copy()
+        self.flat = self.weights.reshape(-1)
+
+        for index, weight in changes:
+            closed = weight is None or not math.isfinite(weight) or (
+                self.blocked_threshold is not None and weight >= self.blocked_threshold)
+            if weight is not None:
+                self.flat[index] = weight
+            if closed and self.blocked is None:
+                self.blocked = np.zeros(self.size, dtype=bool)
+            if self.blocked is not None:
+                self.blocked[index] = closed
+        for cached in ('_min_weight', '_max_weight', '_integer_moves'):
+            self.__dict__.pop(cached, None)
+
+    def index(self, cell):
+        r, c = cell
+        if not (0 <= r < self.rows and 0 <= c < self.cols):
+            raise ValueError(f"cell {cell} is outside the {self.rows}x{self.cols} grid")
+        return r * self.cols + c
+
+    def cell(self, index):
+        return divmod(index, self.cols)
+
+    # Generate (neighbour index, edge cost) pairs leaving a flat cell index
+    def neighbors(self, index):
+        rows, cols, flat = self.rows, self.cols, self.flat
+        r, c = divmod(index, cols)
+        for dr, dc, offset, multiplier in self.moves:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < rows and 0 <= nc < cols:
+                j = index + offset
+                if not self.is_blocked(j):
+                    yield j, flat.item(j) * multiplier
+
+    # Cost of a cell path, summed move by move in the same order as networkx
+    def path_cost(self, path):
+        flat, cols = self.flat, self.cols
+        cost = 0
+        for (r1, c1), (r2, c2) in zip(path, path[1:]):
+            multiplier = self.diag_multiplier if r1 != r2 and c1 != c2 else self.hv_multiplier
+            cost += flat.item(r2 * cols + c2) * multiplier
+        return cost
+
+    # Walk a parent array (stored as index + 1, 0 meaning unseen) back to the source
+    def path_from_parents(self, parent, source, target):
+        path = []
+        node = target
+        while node != source:
+            path.append(divmod(node, self.cols))
+            node = parent.item(node) - 1
+        path.append(divmod(source, self.cols))
+        path.reverse()
+        return path
+
+
+# Lower bound on the cost of any move sequence covering a (dr, dc) displacement:
+# the cheapest mix of straight and diagonal moves, each entering a cell of at
+# least min_weight. Stays admissible whatever the multipliers' ratio is.
+def octile_distance(dr, dc, hv_multiplier, diag_multiplier):
+    dr, dc = abs(dr), abs(dc)
+    low, high = min(dr, dc), max(dr, dc)
+    return min(
+        hv_multiplier * (high - low) + diag_multiplier * low,
+        diag_multiplier * high,
+        hv_multiplier * (dr + dc),
+    )
+
+
+# Admissible, consistent A* heuristic towards a target cell index
+def octile_heuristic(graph, target):
+    cols = graph.cols
+    tr, tc = divmod(target, cols)
+    hv, diag = graph.hv_multiplier, graph.diag_multiplier
+    # Shave a rounding margin so float error can never overestimate
+    scale = graph.min_weight * (1 - 1e-12)
+
+    def heuristic(index):
+        r, c = divmod(index, cols)
+        return scale * octile_distance(r - tr, c - tc, hv, diag)
+
+    return heuristic
+
+
+# Heuristic towards the nearest of several targets; a minimum of consistent
+# heuristics is itself consistent, so one-to-many A* stays exact
+def nearest_target_heuristic(graph, targets):
+    heuristics = [octile_heuristic(graph, target) for target in set(targets)]
+    if len(heuristics) == 1:
+        return heuristics[0]
+    return lambda index: min(h(index) for h in heuristics)
+
+
+# Label-setting search over a GridGraph from one source to a set of targets,
+# optionally guided by a consistent heuristic (A*). Distance and parent arrays
+# are zero-allocated so only the pages the search touches are backed by memory.
+def _search(graph, source, targets, heuristic=None):
+    rows, cols, flat = graph.rows, graph.cols, graph.flat
+    moves = graph.moves
+    dist = np.zeros(graph.size, dtype=np.float64)
+    parent = np.zeros(graph.size, dtype=index_dtype(graph.size))
+    closed = graph.new_closed()
+    if closed.item(source):
+        return dist, parent, np.zeros(graph.size, dtype=bool), 0
+    remaining = {target for target in targets if not closed.item(target)}
+    parent[source] = source + 1
+    heap = [(heuristic(source) if heuristic else 0, 0, source)]
+    expanded = 0
+
+    while heap and remaining:
+        _, d, u = heapq.heappop(heap)
+        if closed.item(u):
+            continue
+        closed[u] = True
+        expanded += 1
+        remaining.discard(u)
+        r, c = divmod(u, cols)
+        interior = 0 < r < rows - 1 and 0 < c < cols - 1
+        for dr, dc, offset, multiplier in moves:
+            if not interior and not (0 <= r + dr < rows and 0 <= c + dc < cols):
+                continue
+            v = u + offset
+            if closed.item(v):
+                continue
+            nd = d + flat.item(v) * multiplier
+            if parent.item(v) == 0 or nd < dist.item(v):
+                dist[v] = nd
+                parent[v] = u + 1
+                heapq.heappush(heap, (nd + heuristic(v) if heuristic else nd, nd, v))
+
+    return dist, parent, closed, expanded
+
+
+# Dial-style bucket-queue Dijkstra over exact integer edge costs, used when
+# graph.integer_moves is available. Every move costs at least delta (the cheapest
+# integer edge), so once the lowest aligned bucket [b*delta, (b+1)*delta) is
+# reached none of its cells can still improve each other: the whole bucket is
+# settled at once and relaxed with array operations.
+def _bucket_search(graph, source, targets):
+    rows, cols, flat = graph.rows, graph.cols, graph.flat
+    moves = graph.integer_moves
+    dist = np.zeros(graph.size, dtype=np.int64)
+    parent = np.zeros(graph.size, dtype=index_dtype(graph.size))
+    closed = graph.new_closed()
+    if closed.item(source):
+        return dist, parent, np.zeros(graph.size, dtype=bool), 0
+    targets = np.asarray(targets, dtype=np.int64)
+    targets = targets[~closed[targets]]
+    parent[source] = source + 1
+
+    multipliers = [m for *_, m in moves]
+    delta = graph.min_weight * min(multipliers)
+    # Only buckets holding entries exist, keyed by id; the upcoming heap orders
+    # them, so runs of empty buckets cost nothing when weights span a wide range
+    buckets = {0: [np.array([source], dtype=np.int64)]}
+    upcoming = [0]
+    expanded = 0
+
+    while upcoming and not closed[targets].all():
+        current = heapq.heappop(upcoming)
+        slot = buckets.pop(current, None)
+        if slot is None:
+            continue
+        nodes = np.unique(np.concatenate(slot))
+        # Drop stale entries whose cell was since improved into a later bucket
+        nodes = nodes[~closed[nodes] & (dist[nodes] // delta == current)]
+        if not len(nodes):
+            continue
+        closed[nodes] = True
+        expanded += len(nodes)
+
+        r, c = np.divmod(nodes, cols)
+        candidates, sources, costs = [], [], []
+        for dr, dc, offset, multiplier in moves:
+            inside = (r + dr >= 0) & (r + dr < rows) & (c + dc >= 0) & (c + dc < cols)
+            u = nodes[inside]
+            v = u + offset
+            open_ = ~closed[v]
+            u, v = u[open_], v[open_]
+            candidates.append(v)
+            sources.append(u)
+            costs.append(dist[u] + flat[v].astype(np.int64) * multiplier)
+        v = np.concatenate(candidates)
+        u = np.concatenate(sources)
+        nd = np.concatenate(costs)
+
+        # Keep the cheapest candidate per cell, then only real improvements
+        order = np.lexsort((nd, v))
+        v, u, nd = v[order], u[order], nd[order]
+        first = np.ones(len(v), dtype=bool)
+        first[1:] = v[1:] != v[:-1]
+        v, u, nd = v[first], u[first], nd[first]
+        better = (parent[v] == 0) | (nd < dist[v])
+        v, u, nd = v[better], u[better], nd[better]
+        dist[v] = nd
+        parent[v] = u + 1
+
+        bucket_ids = nd // delta
+        for bucket_id in np.unique(bucket_ids).tolist():
+            slot = buckets.get(bucket_id)
+            if slot is None:
+                slot = buckets[bucket_id] = []
+                heapq.heappush(upcoming, bucket_id)
+            slot.append(v[bucket_ids == bucket_id])
+
+    return dist, parent, closed, expanded
+
+
+# Bidirectional search between two cells. Entering a cell costs that cell's
+# weight, so edges are not symmetric: the backward search from the target
+# relaxes u -> v at the cost of v's weight while it stands on v, i.e. over the
+# reversed edges. With heuristic factories both searches run on the same
+# reduced costs via the average potential p = (h_to_target - h_to_source) / 2,
+# which stays consistent in both directions, and the meeting cost mu is final
+# once the two queue tops together reach it.
+# Returns (length, meeting cell, forward parents, backward successors, expanded).
+def _bidirectional_search(graph, source, target, heuristic_factory=None):
+    rows, cols, flat = graph.rows, graph.cols, graph.flat
+    moves = graph.moves
+    if heuristic_factory:
+        to_target, to_source = heuristic_factory(graph, target), heuristic_factory(graph, source)
+        potential = lambda index: (to_target(index) - to_source(index)) / 2
+    else:
+        potential = lambda index: 0
+    dists = [np.zeros(graph.size, dtype=np.float64), np.zeros(graph.size, dtype=np.float64)]
+    parents = [np.zeros(graph.size, dtype=index_dtype(graph.size)), np.zeros(graph.size, dtype=index_dtype(graph.size))]
+    closed = [graph.new_closed(), graph.new_closed()]
+    if closed[0].item(source) or closed[0].item(target):
+        return float('inf'), None, parents[0], parents[1], 0
+    parents[0][source] = source + 1
+    parents[1][target] = target + 1
+    heaps = [[(potential(source), 0, source)], [(-potential(target), 0, target)]]
+    signs = (1, -1)
+    best, meeting = (0, source) if source == target else (float('inf'), None)
+    expanded = 0
+
+    while heaps[0] and heaps[1] and heaps[0][0][0] + heaps[1][0][0] < best:
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        dist, parent, done = dists[side], parents[side], closed[side]
+        other_dist, other_parent = dists[1 - side], parents[1 - side]
+        _, d, u = heapq.heappop(heaps[side])
+        if done.item(u):
+            continue
+        done[u] = True
+        expanded += 1
+        r, c = divmod(u, cols)
+        interior = 0 < r < rows - 1 and 0 < c < cols - 1
+        # Forward moves enter v; backward moves leave v to enter u
+        entered = flat.item(u)
+        for dr, dc, offset, multiplier in moves:
+            if not interior and not (0 <= r + dr < rows and 0 <= c + dc < cols):
+                continue
+            v = u + offset
+            if done.item(v):
+                continue
+            nd = d + (flat.item(v) if side == 0 else entered) * multiplier
+            if parent.item(v) == 0 or nd < dist.item(v):
+                dist[v] = nd
+                parent[v] = u + 1
+                heapq.heappush(heaps[side], (nd + signs[side] * potential(v), nd, v))
+            if other_parent.item(v) and nd + other_dist.item(v) < best:
+                best, meeting = nd + other_dist.item(v), v
+
+    return best, meeting, parents[0], parents[1], expanded
+
+
+# Read the path off a finished bidirectional search: forward parents up to the
+# meeting cell, then backward successors (also stored as index + 1) to the target
+def _bidirectional_path(graph, search, source, target, stats):
+    _, meeting, parent, successor, expanded = search
+    if stats is not None:
+        stats['expanded'] = stats.get('expanded', 0) + expanded
+    if meeting is None:
+        return float('inf'), []
+    path = graph.path_from_parents(parent, source, meeting)
+    node = meeting
+    while node != target:
+        node = successor.item(node) - 1
+        path.append(divmod(node, graph.cols))
+    return graph.path_cost(path), path
+
+
+# Read the paths to each target off a finished search. Lengths are re-summed
+# along the path in float so they match the networkx model exactly.
+def _collect(graph, search, source, targets, stats):
+    _, parent, closed, expanded = search
+    if stats is not None:
+        stats['expanded'] = stats.get('expanded', 0) + expanded
+    results = []
+    for target in targets:
+        if not closed.item(target) or graph.is_blocked(target):
+            results.append((float('inf'), []))
+            continue
+        path = graph.path_from_parents(parent, source, target)
+        results.append((graph.path_cost(path), path))
+    return results
+
+
+def _single_pair(graph, start, end, heuristic_factory, stats):
+    source, target = graph.index(start), graph.index(end)
+    heuristic = heuristic_factory(graph, target) if heuristic_factory else None
+    return _collect(graph, _search(graph, source, [target], heuristic), source, [target], stats)[0]
+
+
+# Find the shortest path between two cells with Dijkstra's algorithm. Integral
+# grids with integer-scalable multipliers and a narrow cost range switch to the
+# bucket-queue engine (see GridGraph.dense_buckets).
+def dijkstra_shortest_path(graph, start, end, stats=None):
+    if graph.dense_buckets:
+        return bucket_shortest_path(graph, start, end, stats)
+    return _single_pair(graph, start, end, None, stats)
+
+
+# Dijkstra on exact integer costs with a bucket queue
+def bucket_shortest_path(graph, start, end, stats=None):
+    if graph.integer_moves is None:
+        raise ValueError("bucket search needs an integral grid and integer-scalable multipliers")
+    source, target = graph.index(start), graph.index(end)
+    return _collect(graph, _bucket_search(graph, source, [target]), source, [target], stats)[0]
+
+
+# Find the shortest path between two cells with A*. The default octile heuristic
+# keeps the result optimal while expanding far fewer cells on large grids.
+def astar_shortest_path(graph, start, end, stats=None, heuristic=octile_heuristic):
+    return _single_pair(graph, start, end, heuristic, stats)
+
+
+# Dijkstra from both ends at once; on long moves the two frontiers meet after
+# settling roughly half the cells a one-sided search would
+def bidirectional_shortest_path(graph, start, end, stats=None, heuristic=None):
+    source, target = graph.index(start), graph.index(end)
+    return _bidirectional_path(graph, _bidirectional_search(graph, source, target, heuristic), source, target, stats)
+
+
+# Bidirectional A* with the octile heuristic towards each end
+def bidirectional_astar_shortest_path(graph, start, end, stats=None, heuristic=octile_heuristic):
+    return bidirectional_shortest_path(graph, start, end, stats, heuristic)
+
+
+# Route from one start to several ends with a single one-to-many search that
+# stops once every end is settled; all paths are read off the shared parent array
+def shortest_paths_from(graph, start, ends, method='dijkstra', stats=None):
+    if method not in ('dijkstra', 'astar', 'bucket'):
+        return [shortest_path(graph, start, end, method, stats) for end in ends]
+    source = graph.index(start)
+    targets = [graph.index(end) for end in ends]
+    if method == 'astar':
+        search = _search(graph, source, targets, nearest_target_heuristic(graph, targets))
+    elif graph.dense_buckets or (method == 'bucket' and graph.integer_moves is not None):
+        search = _bucket_search(graph, source, targets)
+    elif method == 'bucket':
+        raise ValueError("bucket search needs an integral grid and integer-scalable multipliers")
+    else:
+        search = _search(graph, source, targets)
+    return _collect(graph, search, source, targets, stats)
+
+
+SEARCH_METHODS = {
+    'dijkstra': dijkstra_shortest_path,
+    'astar': astar_shortest_path,
+    'bucket': bucket_shortest_path,
+    'bidirectional': bidirectional_shortest_path,
+    'bidirectional_astar': bidirectional_astar_shortest_path,
+}
+
+
+# Route one pair with the named search method. When a stats dict is passed the
+# number of expanded cells is accumulated under 'expanded'.
+def shortest_path(graph, start, end, method='dijkstra', stats=None):
+    try:
+        search = SEARCH_METHODS[method]
+    except KeyError:
+        raise ValueError(f"unknown search method {method!r}, expected one of {sorted(SEARCH_METHODS)}")
+    return search(graph, start, end, stats=stats)
+
+
+# Direction code of each (row offset, column offset) move, and the same codes
+# seen through a transposed view of the grid
+MOVE_CODES = {(dr, dc): code for code, (dr, dc, _) in enumerate(MOVES)}
+TRANSPOSED_MOVE_CODES = {(dc, dr): code for (dr, dc), code in MOVE_CODES.items()}
+
+
+# Relax a run of cells along a single row in one direction (dc = +1 or -1). Runs
+# of any length are covered in log2(cols) steps by doubling the run each step;
+# once a step changes nothing the row is closed under single moves and stops.
+# With leaving=True a move costs the cell it leaves instead of the one it enters.
+def _relax_run(dist, directions, run_cost, dc, codes, leaving=False):
+    cols = len(dist)
+    before = dist.copy()
+    run_cost = run_cost.copy()
+    steps = 1
+    while steps < cols:
+        if dc > 0:
+            dst, src = slice(steps, cols), slice(0, cols - steps)
+        else:
+            dst, src = slice(0, cols - steps), slice(steps, cols)
+        candidate = dist[src] + (run_cost[src] if leaving else run_cost[dst])
+        better = candidate < dist[dst]
+        if not better.any():
+            break
+        dist[dst][better] = candidate[better]
+        if leaving:
+            run_cost[src] = run_cost[src] + run_cost[dst]
+        else:
+            run_cost[dst] = run_cost[dst] + run_cost[src]
+        steps *= 2
+    better = dist < before
+    directions[better] = codes[0, dc]
+
+
+# Relax row r from the row behind it (dr = +1 or -1) through its straight and
+# both diagonal moves, then along the row itself. Returns whether anything in
+# the row improved.
+def _relax_row(dist, directions, hv_cost, diag_cost, r, dr, codes, leaving=False):
+    row, previous = dist[r], dist[r - dr]
+    improved = np.zeros(len(row), dtype=bool)
+    for dc, dst, src, cost in (
+        (0, slice(None), slice(None), hv_cost),
+        (1, slice(1, None), slice(None, -1), diag_cost),
+        (-1, slice(None, -1), slice(1, None), diag_cost),
+    ):
+        candidate = previous[src] + (cost[r - dr, src] if leaving else cost[r, dst])
+        better = candidate < row[dst]
+        if better.any():
+            row[dst][better] = candidate[better]
+            directions[r, dst][better] = codes[dr, dc]
+            improved[dst] |= better
+    changed = np.flatnonzero(improved)
+    if not len(changed):
+        return False
+    # Only cells that just improved can pass a better cost along the row
+    first, last = changed[0], changed[-1] + 1
+    _relax_run(row[first:], directions[r, first:], hv_cost[r, first:], 1, codes, leaving)
+    _relax_run(row[:last], directions[r, :last], hv_cost[r, :last], -1, codes, leaving)
+    return True
+
+
+# Sweep every row of the arrays forwards and then backwards
+def _sweep(dist, directions, hv_cost, diag_cost, codes, leaving=False):
+    improved = False
+    rows = len(dist)
+    for r in range(1, rows):
+        improved |= _relax_row(dist, directions, hv_cost, diag_cost, r, 1, codes, leaving)
+    for r in range(rows - 2, -1, -1):
+        improved |= _relax_row(dist, directions, hv_cost, diag_cost, r, -1, codes, leaving)
+    return improved
+
+
+# Travel cost from a start cell to every cell of the grid, plus a direction
+# field holding the code (index into MOVES) of the last move on a cheapest path
+# into each cell, -1 for the start and unreachable cells. Read paths off it with
+# path_from_field.
+#
+# The field is built with vectorized wavefront sweeps instead of a heap. A
+# sweep walks the rows one at a time, relaxing each row from its neighbour row
+# and then along itself with array operations; sweeps run down, up, right and
+# left (the last two over transposed views) and repeat until nothing improves.
+# Any stretch of a path that is monotone in one axis is settled in a single
+# sweep, so open yards and scattered obstacles need only a handful of rounds.
+# Winding layouts such as mazes need about one round per turn of the longest
+# path, so after about log2(cells) rounds the field is finished by a one-to-all
+# heap search instead. Costs match Dijkstra up to float rounding of the
+# summation order.
+#
+# With reverse=True the field holds the cost from every cell to start instead:
+# the sweeps run over the reversed edges, where a move costs the weight of the
+# cell it leaves, and path_from_field then reads the route to start backwards.
+def cost_to_go_field(graph, start, reverse=False):
+    rows, cols = graph.rows, graph.cols
+    entry = graph.weights.astype(np.float64)
+    if graph.blocked is not None:
+        entry[graph.blocked.reshape(rows, cols)] = np.inf
+    hv_cost = entry * graph.hv_multiplier
+    diag_cost = entry * graph.diag_multiplier
+    dist = np.full((rows, cols), np.inf)
+    directions = np.full((rows, cols), -1, dtype=np.int8)
+    if graph.is_blocked(graph.index(start)):
+        return dist, directions
+
+    r = start[0]
+    dist[start] = 0
+    _relax_run(dist[r], directions[r], hv_cost[r], 1, MOVE_CODES, reverse)
+    _relax_run(dist[r], directions[r], hv_cost[r], -1, MOVE_CODES, reverse)
+    improved = True
+    rounds = max(graph.size.bit_length(), 4)
+    while improved and rounds:
+        improved = _sweep(dist, directions, hv_cost, diag_cost, MOVE_CODES, reverse)
+        improved |= _sweep(dist.T, directions.T, hv_cost.T, diag_cost.T, TRANSPOSED_MOVE_CODES, reverse)
+        rounds -= 1
+    if improved:
+        _field_search(dist, directions, hv_cost, diag_cost, graph.index(start), reverse)
+
+    # Leaving costs never charge the cell entered, so blocked cells are reset here;
+    # nothing could pass through them since leaving one costs inf
+    if reverse and graph.blocked is not None:
+        blocked = graph.blocked.reshape(rows, cols)
+        dist[blocked] = np.inf
+        directions[blocked] = -1
+    return dist, directions
+
+
+# Heap Dijkstra from source filling the dist and direction arrays of
+# cost_to_go_field, for grids the sweeps settle too slowly. hv_cost and
+# diag_cost are the per-cell move costs (inf for blocked cells); with
+# leaving=True a move costs the cell it leaves, as in the reversed sweeps.
+def _field_search(dist, directions, hv_cost, diag_cost, source, leaving=False):
+    rows, cols = dist.shape
+    dist_flat, direction_flat = dist.reshape(-1), directions.reshape(-1)
+    dist_flat[:] = np.inf
+    direction_flat[:] = -1
+    dist_flat[source] = 0
+    costs = (hv_cost.reshape(-1), diag_cost.reshape(-1))
+    steps = [(dr, dc, dr * cols + dc, code, costs[diag]) for code, (dr, dc, diag) in enumerate(MOVES)]
+    closed = np.zeros(rows * cols, dtype=bool)
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if closed.item(u):
+            continue
+        closed[u] = True
+        r, c = divmod(u, cols)
+        interior = 0 < r < rows - 1 and 0 < c < cols - 1
+        for dr, dc, offset, code, cost in steps:
+            if not interior and not (0 <= r + dr < rows and 0 <= c + dc < cols):
+                continue
+            v = u + offset
+            if closed.item(v):
+                continue
+            nd = d + cost.item(u if leaving else v)
+            if nd < dist_flat.item(v):
+                dist_flat[v] = nd
+                direction_flat[v] = code
+                heapq.heappush(heap, (nd, v))
+
+
+# Read the path from the field's start to a cell in O(path length); [] when
+# the cell is unreachable
+def path_from_field(dist, directions, end):
+    r, c = end
+    if dist[r, c] == np.inf:
+        return []
+    path = [(r, c)]
+    for _ in range(directions.size):
+        code = directions.item(r, c)
+        if code < 0:
+            break
+        dr, dc, _ = MOVES[code]
+        r, c = r - dr, c - dc
+        path.append((r, c))
+    path.reverse()
+    return path
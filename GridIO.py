@@ -0,0 +1,130 @@
+import json
+import math
+import os
+import numpy as np
+from GridGraph import GridGraph
+
+
+# Default cost model of a grid: square cells of side cell_size, moves costing
+# the weight entered times cell_size / 1000 straight and the diagonal of the
+# cell / 1000 diagonally (hv_multiplier = 100 / 1000 for 100-unit cells, as in
+# the example scripts); multipliers of 1 when the cell size is unknown
+def default_multipliers(cell_size):
+    if cell_size is None:
+        return 1, 1
+    return cell_size / 1000, math.sqrt(2 * cell_size**2) / 1000
+
+
+# Sidecar metadata file of a grid saved at grid_path (yard.npy -> yard.json)
+def metadata_path(grid_path):
+    base = grid_path[:-4] if grid_path.endswith('.npy') else grid_path
+    return f"{base}.json"
+
+
+# Plain JSON value for NumPy scalars and tuples
+def _plain(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (tuple, list, np.ndarray)):
+        return [_plain(item) for item in value]
+    return value
+
+
+# Complete metadata: cell_size (None when unknown), origin (the x, y world
+# position of cell (0, 0)), hv_multiplier, diag_multiplier (derived from
+# cell_size when missing) and blocked_threshold (None when no weight blocks)
+def grid_metadata(cell_size=None, origin=(0, 0), hv_multiplier=None, diag_multiplier=None, blocked_threshold=None):
+    default_hv, default_diag = default_multipliers(cell_size)
+    return {
+        'cell_size': _plain(cell_size),
+        'origin': _plain(origin),
+        'hv_multiplier': _plain(default_hv if hv_multiplier is None else hv_multiplier),
+        'diag_multiplier': _plain(default_diag if diag_multiplier is None else diag_multiplier),
+        'blocked_threshold': _plain(blocked_threshold),
+    }
+
+
+# Write a cost grid with its metadata and return the metadata. A .npy file gets
+# a JSON sidecar (see metadata_path) and can be memory-mapped on load; a .npz
+# file holds the grid and the metadata together, compressed if asked, but is
+# read into memory whole.
+def save_grid(path, grid, cell_size=None, origin=(0, 0), hv_multiplier=None, diag_multiplier=None,
+              blocked_threshold=None, compressed=False):
+    weights = np.asarray(grid)
+    if weights.ndim != 2:
+        raise ValueError("grid must be two-dimensional")
+    metadata = grid_metadata(cell_size, origin, hv_multiplier, diag_multiplier, blocked_threshold)
+    if path.endswith('.npz'):
+        save = np.savez_compressed if compressed else np.savez
+        save(path, grid=weights, metadata=json.dumps(metadata))
+    elif path.endswith('.npy'):
+        np.save(path, weights)
+        with open(metadata_path(path), 'w') as file:
+            json.dump(metadata, file, indent=2)
+    else:
+        raise ValueError(f"grid files must end in .npy or .npz, not {path}")
+    return metadata
+
+
+# Read a grid saved by save_grid as (grid, metadata). A .npy grid is
+# memory-mapped read-only unless mmap is False, so opening even a very large
+# raster is instant and only the pages a search touches are read from disk.
+# A .npy file without a sidecar gets the default metadata.
+def load_grid(path, mmap=True):
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            grid = data['grid']
+            metadata = json.loads(data['metadata'].item()) if 'metadata' in data.files else {}
+    elif path.endswith('.npy'):
+        grid = np.load(path, mmap_mode='r' if mmap else None)
+        metadata = {}
+        if os.path.exists(metadata_path(path)):
+            with open(metadata_path(path)) as file:
+                metadata = json.load(file)
+    else:
+        raise ValueError(f"grid files must end in .npy or .npz, not {path}")
+    return grid, grid_metadata(**metadata)
+
+
+# GridGraph over a saved grid with the file's multipliers and blocked threshold,
+# returned with the metadata. Note that a blocked threshold is checked against
+# every weight once, which reads a memory-mapped grid through in one pass.
+def load_graph(path, mmap=True, blocked=None):
+    grid, metadata = load_grid(path, mmap)
+    graph = GridGraph(grid, metadata['hv_multiplier'], metadata['diag_multiplier'], blocked,
+                      metadata['blocked_threshold'])
+    return graph, metadata
+
+
+# World (x, y) position of a cell's centre, columns running along x
+def cell_to_world(metadata, cell):
+    size = metadata['cell_size'] or 1
+    x0, y0 = metadata['origin']
+    return x0 + cell[1] * size, y0 + cell[0] * size
+
+
+# Cell containing a world (x, y) position
+def world_to_cell(metadata, point):
+    size = metadata['cell_size'] or 1
+    x0, y0 = metadata['origin']
+    return math.floor((point[1] - y0) / size + 0.5), math.floor((point[0] - x0) / size + 0.5)
+
+
+# Example Usage
+if __name__ == "__main__":
+    import random
+    import tempfile
+    import time
+    from GridGraph import shortest_path
+
+    rng = random.Random(0)
+    grid = np.array([[rng.choice([2273, 3085, 3735, 5230, 7684, 11275]) for _ in range(2000)] for _ in range(2000)],
+                    dtype=np.int32)
+    grid_path = os.path.join(tempfile.mkdtemp(), 'yard.npy')
+    save_grid(grid_path, grid, cell_size=100, origin=(512300.0, 6834100.0))
+
+    start_time = time.time()
+    graph, metadata = load_graph(grid_path)
+    print(f"Opened {graph.rows}x{graph.cols} grid in {time.time() - start_time} seconds: {metadata}")
+    length, path = shortest_path(graph, (10, 10), (60, 80), 'astar')
+    print(f"Length {length} from {cell_to_world(metadata, path[0])} to {cell_to_world(metadata, path[-1])}")
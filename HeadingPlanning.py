@@ -0,0 +1,146 @@
+import heapq
+import numpy as np
+from GridGraph import MOVES, index_dtype, octile_heuristic
+
+HEADINGS = len(MOVES)
+
+
+# Penalty for changing heading by 0, 45, 90, 135 and 180 degrees. A number is
+# charged once per 45 degree step; a sequence gives the five penalties directly
+# (use float('inf') to forbid a turn, e.g. reversing on the spot).
+def turn_penalties(turn_cost):
+    if np.ndim(turn_cost) == 0:
+        return [turn_cost * steps for steps in range(HEADINGS // 2 + 1)]
+    penalties = list(turn_cost)
+    if len(penalties) != HEADINGS // 2 + 1:
+        raise ValueError(f"expected {HEADINGS // 2 + 1} turn penalties (0 to 180 degrees), got {len(penalties)}")
+    return penalties
+
+
+# Planner over (row, col, heading) states for crawler cranes, which cannot turn
+# for free. A state is the compact integer cell * 8 + heading, the heading
+# being the MOVES direction code of the last move. Moving into a neighbour costs
+# the same as on the GridGraph plus the penalty for the heading change, and
+# the motion primitives of each heading are precomputed with their penalties.
+# With turn_cost=0 the lengths equal those of the plain 8-neighbour grid.
+class HeadingPlanner:
+    def __init__(self, graph, turn_cost=0):
+        self.graph = graph
+        self.penalties = turn_penalties(turn_cost)
+        self.primitives = []
+        for heading in range(HEADINGS):
+            primitives = []
+            for code, (dr, dc, offset, multiplier) in enumerate(graph.moves):
+                steps = abs(code - heading)
+                penalty = self.penalties[min(steps, HEADINGS - steps)]
+                if penalty != float('inf'):
+                    primitives.append((code, dr, dc, offset, multiplier, penalty))
+            self.primitives.append(primitives)
+
+    def new_closed(self):
+        if self.graph.blocked is None:
+            return np.zeros(self.graph.size * HEADINGS, dtype=bool)
+        return np.repeat(self.graph.blocked, HEADINGS)
+
+    # Turn penalties along a cell path, starting from start_heading when given
+    def turn_cost_of(self, path, start_heading=None):
+        cost = 0
+        heading = start_heading
+        for (r1, c1), (r2, c2) in zip(path, path[1:]):
+            code = MOVES.index((r2 - r1, c2 - c1, r1 != r2 and c1 != c2))
+            if heading is not None:
+                steps = abs(code - heading)
+                cost += self.penalties[min(steps, HEADINGS - steps)]
+            heading = code
+        return cost
+
+    # A* from start to end over heading states, guided by the octile heuristic on
+    # cells (turn penalties are non-negative, so it stays admissible). Headings
+    # are MOVES codes; None leaves the start or arrival heading free. Returns
+    # (length including turn penalties, cell path).
+    def route(self, start, end, start_heading=None, end_heading=None, stats=None):
+        graph = self.graph
+        rows, cols, flat = graph.rows, graph.cols, graph.flat
+        source, target = graph.index(start), graph.index(end)
+        heuristic = octile_heuristic(graph, target)
+        size = graph.size * HEADINGS
+        dist = np.zeros(size, dtype=np.float64)
+        parent = np.zeros(size, dtype=index_dtype(size))
+        closed = self.new_closed()
+        goals = range(target * HEADINGS, (target + 1) * HEADINGS) if end_heading is None else [target * HEADINGS + end_heading]
+        goal = None
+        expanded = 0
+
+        if not closed.item(source * HEADINGS) and not graph.is_blocked(target):
+            heap = []
+            for heading in (range(HEADINGS) if start_heading is None else [start_heading]):
+                state = source * HEADINGS + heading
+                parent[state] = state + 1
+                heap.append((heuristic(source), 0, state))
+            heapq.heapify(heap)
+            goals = set(goals)
+            while heap:
+                _, d, state = heapq.heappop(heap)
+                if closed.item(state):
+                    continue
+                closed[state] = True
+                expanded += 1
+                if state in goals:
+                    goal = state
+                    break
+                u, heading = divmod(state, HEADINGS)
+                r, c = divmod(u, cols)
+                interior = 0 < r < rows - 1 and 0 < c < cols - 1
+                for code, dr, dc, offset, multiplier, penalty in self.primitives[heading]:
+                    if not interior and not (0 <= r + dr < rows and 0 <= c + dc < cols):
+                        continue
+                    v = u + offset
+                    next_state = v * HEADINGS + code
+                    if closed.item(next_state):
+                        continue
+                    nd = d + flat.item(v) * multiplier + penalty
+                    if parent.item(next_state) == 0 or nd < dist.item(next_state):
+                        dist[next_state] = nd
+                        parent[next_state] = state + 1
+                        heapq.heappush(heap, (nd + heuristic(v), nd, next_state))
+
+        if stats is not None:
+            stats['expanded'] = stats.get('expanded', 0) + expanded
+        if goal is None:
+            return float('inf'), []
+        path = []
+        state = goal
+        while True:
+            path.append(divmod(state // HEADINGS, cols))
+            previous = parent.item(state) - 1
+            if previous == state:
+                break
+            state = previous
+        path.reverse()
+        return graph.path_cost(path) + self.turn_cost_of(path, start_heading), path
+
+
+# Example Usage
+if __name__ == "__main__":
+    import math
+    from GridGraph import GridGraph, shortest_path
+
+    grid = [
+        [7684,7684,3085,3735,3735,3735,1000000,1000000,1000000,1000000,1000000,1000000,5230,5230],
+        [7684,7684,3085,3735,3735,3735,1000000,1000000,1000000,1000000,1000000,1000000,5230,5230],
+        [7684,7684,3085,5831,1000000,11275,11275,11275,9293,9293,5230,5230,5230,5230],
+        [1000000,1000000,1000000,5831,5831,11275,11275,11275,3264,5230,5230,5230,3085,3085],
+        [1000000,1000000,1000000,11275,5831,11275,11275,11275,3735,5230,5230,5230,3085,3085],
+        [6075,11275,11275,11275,3735,3735,3085,3735,3735,3735,2273,3085,3085,3085],
+        [6075,11275,11275,11275,6985,7684,7684,7684,3735,4239,4239,8708,8708,8708],
+        [3264,3264,3264,6985,6985,7684,7684,7684,3085,4239,1000000,8708,8708,8708],
+        [3264,3264,3264,8708,8708,8708,8708,8708,3085,4239,4239,8708,8708,8708],
+        [3085,3085,3085,8708,8708,1000000,8708,8708,3085,3085,2663,3264,3264,3264],
+        [3085,5003,5003,8708,8708,1000000,8708,8708,5230,5831,5831,11275,11275,11275],
+        [3264,5003,5003,5003,2273,2273,2273,5230,5230,5831,5831,11275,11275,11275]
+    ]
+    graph = GridGraph(grid, 100 / 1000, math.sqrt(2 * 100**2) / 1000, blocked_threshold=1000000)
+    print(f"Grid path: {shortest_path(graph, (11, 4), (1, 13))}")
+    for turn_cost in (0, 200, 1000):
+        length, path = HeadingPlanner(graph, turn_cost).route((11, 4), (1, 13))
+        print(f"Turn cost {turn_cost}: length {length}, path {path}")
@@ -0,0 +1,229 @@
+import heapq
+import numpy as np
+from GridGraph import GridGraph, astar_shortest_path, cost_to_go_field, path_from_field
+
+
+# Split a boolean row of border cells into runs of consecutive True values
+def _segments(mask, offset):
+    segments = []
+    start = None
+    for i, ok in enumerate(mask):
+        if ok and start is None:
+            start = i
+        elif not ok and start is not None:
+            segments.append((offset + start, offset + i))
+            start = None
+    if start is not None:
+        segments.append((offset + start, offset + len(mask)))
+    return segments
+
+
+# HPA*-style hierarchical planner for very large site grids. The cost grid is
+# split into square clusters; every open stretch of a cluster border gets one
+# or more entrance cells on each side, diagonal-only crossings (including
+# ones through a cluster corner) get a transition of their own, and the cost
+# between each pair of entrances inside a cluster is precomputed with the same
+# hv/diag cost model.
+# Queries connect start and end to the entrances of their clusters, search
+# the small abstract graph and refine each abstract hop with a local search.
+# Paths stay within clusters between entrances, so they can be slightly longer
+# than the exact optimum; a smaller entrance_spacing trades preprocessing time
+# for shorter paths, and route(compare_exact=True) reports the gap.
+class HierarchicalPlanner:
+    def __init__(self, graph, cluster_size=32, entrance_spacing=None):
+        self.graph = graph
+        self.cluster_size = cluster_size
+        self.entrance_spacing = entrance_spacing or max(cluster_size // 2, 1)
+        rows, cols = graph.rows, graph.cols
+        self.open = np.ones((rows, cols), dtype=bool) if graph.blocked is None else ~graph.blocked.reshape(rows, cols)
+        self.edges = {}
+        self.cluster_nodes = {}
+        self._add_entrances()
+        self._connect_entrances()
+
+    def cluster_of(self, index):
+        r, c = divmod(index, self.graph.cols)
+        return r // self.cluster_size, c // self.cluster_size
+
+    # Local GridGraph over one cluster, plus the cluster's top-left cell
+    def _local_graph(self, cluster):
+        graph, size = self.graph, self.cluster_size
+        r0, c0 = cluster[0] * size, cluster[1] * size
+        window = (slice(r0, min(r0 + size, graph.rows)), slice(c0, min(c0 + size, graph.cols)))
+        local = GridGraph(graph.weights[window], graph.hv_multiplier, graph.diag_multiplier, blocked=~self.open[window])
+        return local, r0, c0
+
+    def _add_node(self, index):
+        self.edges.setdefault(index, {})
+        self.cluster_nodes.setdefault(self.cluster_of(index), set()).add(index)
+
+    def _add_edge(self, u, v, cost):
+        if cost < self.edges[u].get(v, float('inf')):
+            self.edges[u][v] = cost
+
+    # Link two adjacent cells on either side of a cluster border in both directions
+    def _add_transition(self, a, b):
+        graph = self.graph
+        ia, ib = graph.index(a), graph.index(b)
+        multiplier = graph.diag_multiplier if a[0] != b[0] and a[1] != b[1] else graph.hv_multiplier
+        self._add_node(ia)
+        self._add_node(ib)
+        self._add_edge(ia, ib, graph.flat.item(ib) * multiplier)
+        self._add_edge(ib, ia, graph.flat.item(ia) * multiplier)
+
+    # One entrance in the middle of short border runs; long runs get one at each
+    # end plus one every entrance_spacing cells in between
+    def _entrance_positions(self, start, end):
+        if end - start < 6:
+            return [(start + end - 1) // 2]
+        return sorted(set(range(start, end - 1, self.entrance_spacing)) | {end - 1})
+
+    def _add_entrances(self):
+        rows, cols, size, open_ = self.graph.rows, self.graph.cols, self.cluster_size, self.open
+        for c in range(size, cols, size):
+            for r0 in range(0, rows, size):
+                r1 = min(r0 + size, rows)
+                for start, end in _segments(open_[r0:r1, c - 1] & open_[r0:r1, c], r0):
+                    for r in self._entrance_positions(start, end):
+                        self._add_transition((r, c - 1), (r, c))
+            for r, dr in self._diagonal_crossings(open_[:, c - 1], open_[:, c]):
+                self._add_transition((r, c - 1), (r + dr, c))
+        for r in range(size, rows, size):
+            for c0 in range(0, cols, size):
+                c1 = min(c0 + size, cols)
+                for start, end in _segments(open_[r - 1, c0:c1] & open_[r, c0:c1], c0):
+                    for c in self._entrance_positions(start, end):
+                        self._add_transition((r - 1, c), (r, c))
+            for c, dc in self._diagonal_crossings(open_[r - 1], open_[r]):
+                self._add_transition((r - 1, c), (r, c + dc))
+
+    # Diagonal steps across a border (i -> i + 1 or i + 1 -> i along it, as
+    # (i, +1) or (i + 1, -1)) that no straight crossing next to them can stand
+    # in for, such as a corridor running diagonally through a border or a
+    # cluster corner. Where one of the two straight crossings is open, the
+    # entrance of its stretch already connects the same cells.
+    @staticmethod
+    def _diagonal_crossings(before, after):
+        straight = before & after
+        alone = ~straight[:-1] & ~straight[1:]
+        down = np.flatnonzero(before[:-1] & after[1:] & alone)
+        up = np.flatnonzero(before[1:] & after[:-1] & alone)
+        return [(i, 1) for i in down.tolist()] + [(i + 1, -1) for i in up.tolist()]
+
+    # Precompute entrance-to-entrance costs inside every cluster
+    def _connect_entrances(self):
+        for cluster, nodes in self.cluster_nodes.items():
+            local, r0, c0 = self._local_graph(cluster)
+            for u in nodes:
+                dist = self._local_costs(local, r0, c0, u)
+                for v in nodes:
+                    r, c = divmod(v, self.graph.cols)
+                    if v != u and dist[r - r0, c - c0] < np.inf:
+                        self._add_edge(u, v, dist[r - r0, c - c0].item())
+
+    def _local_costs(self, local, r0, c0, index):
+        r, c = divmod(index, self.graph.cols)
+        return cost_to_go_field(local, (r - r0, c - c0))[0]
+
+    # Cheapest path between two cells of the same cluster, staying inside it
+    def _local_path(self, u, v):
+        local, r0, c0 = self._local_graph(self.cluster_of(u))
+        cols = self.graph.cols
+        (ur, uc), (vr, vc) = divmod(u, cols), divmod(v, cols)
+        dist, directions = cost_to_go_field(local, (ur - r0, uc - c0))
+        return [(r + r0, c + c0) for r, c in path_from_field(dist, directions, (vr - r0, vc - c0))]
+
+    def _abstract_search(self, source, target, extra_edges, stats):
+        dist = {source: 0}
+        parent = {source: None}
+        closed = set()
+        heap = [(0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u in closed:
+                continue
+            closed.add(u)
+            if u == target:
+                break
+            for v, cost in list(self.edges.get(u, {}).items()) + extra_edges.get(u, []):
+                nd = d + cost
+                if v not in closed and nd < dist.get(v, float('inf')):
+                    dist[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd, v))
+        if stats is not None:
+            stats['abstract_expanded'] = stats.get('abstract_expanded', 0) + len(closed)
+        if target not in closed:
+            return []
+        nodes = [target]
+        while parent[nodes[-1]] is not None:
+            nodes.append(parent[nodes[-1]])
+        nodes.reverse()
+        return nodes
+
+    # Route start -> end through the abstract graph. With compare_exact=True the
+    # exact A* length and the ratio between the two are recorded in stats.
+    def route(self, start, end, stats=None, compare_exact=False):
+        graph = self.graph
+        source, target = graph.index(start), graph.index(end)
+        if graph.is_blocked(source) or graph.is_blocked(target):
+            return float('inf'), []
+
+        # Temporary edges from the start into its cluster and from the end's cluster into the end
+        extra_edges = {}
+        start_cluster, end_cluster = self.cluster_of(source), self.cluster_of(target)
+        local, r0, c0 = self._local_graph(start_cluster)
+        dist = self._local_costs(local, r0, c0, source)
+        candidates = set(self.cluster_nodes.get(start_cluster, ()))
+        if start_cluster == end_cluster:
+            candidates.add(target)
+        for v in candidates:
+            r, c = divmod(v, graph.cols)
+            if v != source and dist[r - r0, c - c0] < np.inf:
+                extra_edges.setdefault(source, []).append((v, dist[r - r0, c - c0].item()))
+        if target not in self.edges:
+            local, r0, c0 = self._local_graph(end_cluster)
+            tr, tc = divmod(target, graph.cols)
+            for u in self.cluster_nodes.get(end_cluster, ()):
+                cost = self._local_costs(local, r0, c0, u)[tr - r0, tc - c0]
+                if cost < np.inf:
+                    extra_edges.setdefault(u, []).append((target, cost.item()))
+
+        nodes = self._abstract_search(source, target, extra_edges, stats)
+        if not nodes:
+            length, path = float('inf'), []
+        else:
+            path = [divmod(source, graph.cols)]
+            for u, v in zip(nodes, nodes[1:]):
+                if self.cluster_of(u) != self.cluster_of(v):
+                    path.append(divmod(v, graph.cols))
+                else:
+                    path.extend(self._local_path(u, v)[1:])
+            length = graph.path_cost(path) if len(path) > 1 else 0
+
+        if compare_exact and stats is not None:
+            exact_length, _ = astar_shortest_path(graph, start, end)
+            stats['exact_length'] = exact_length
+            stats['suboptimality'] = length / exact_length if exact_length else 1.0
+        return length, path
+
+
+# Example Usage
+if __name__ == "__main__":
+    import math
+    import random
+    import time
+
+    rng = random.Random(0)
+    grid = np.array([[rng.choice([2273, 3085, 3735, 5230, 7684, 11275]) for _ in range(400)] for _ in range(400)])
+    graph = GridGraph(grid, 100 / 1000, math.sqrt(2 * 100**2) / 1000)
+
+    start_time = time.time()
+    planner = HierarchicalPlanner(graph, cluster_size=40)
+    print(f"Preprocessing: {time.time() - start_time} seconds")
+
+    stats = {}
+    start_time = time.time()
+    length, path = planner.route((5, 5), (390, 380), stats, compare_exact=True)
+    print(f"Hierarchical path length: {length} ({len(path)} cells)")
+    print(f"Exact path length: {stats['exact_length']}, ratio {stats['suboptimality']}")
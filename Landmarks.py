@@ -0,0 +1,171 @@
+import json
+import os
+import numpy as np
+from GridGraph import astar_shortest_path, cost_to_go_field, octile_heuristic
+from RoutingSession import grid_fingerprint
+
+# Relative float32 rounding error of one stored distance, doubled for safety
+FLOAT32_MARGIN = 2.0**-23
+
+
+# Sidecar files of the landmark index for a grid saved at grid_path
+# (yard.npy -> yard.landmarks.npy and yard.landmarks.json)
+def landmark_paths(grid_path):
+    base = grid_path[:-4] if grid_path.endswith('.npy') else grid_path
+    return f"{base}.landmarks.npy", f"{base}.landmarks.json"
+
+
+# Farthest-point landmark selection: each new landmark is the reachable cell
+# farthest (by travel cost) from every landmark picked so far, which spreads
+# them over the edges of the yard where their bounds are tightest
+def select_landmarks(graph, count):
+    open_cells = np.flatnonzero(~graph.blocked) if graph.blocked is not None else np.arange(graph.size)
+    if not len(open_cells):
+        return [], []
+    seed = graph.cell(open_cells[0].item())
+    nearest = cost_to_go_field(graph, seed)[0]
+    landmarks, forward = [], []
+    for _ in range(count):
+        candidates = np.where(np.isfinite(nearest), nearest, -1)
+        index = candidates.argmax().item()
+        if landmarks and candidates.flat[index] <= 0:
+            break
+        cell = graph.cell(index)
+        field = cost_to_go_field(graph, cell)[0]
+        nearest = field if not landmarks else np.minimum(nearest, field)
+        landmarks.append(cell)
+        forward.append(field)
+    return landmarks, forward
+
+
+# ALT (A*, landmarks, triangle inequality) preprocessing for a frozen cost grid.
+# For each landmark L the index keeps d(L, v) and d(v, L) for every cell as
+# float32, and bounds the remaining cost from v to a target t by
+#     max(d(L, t) - d(L, v), d(v, L) - d(t, L))
+# over all landmarks, combined with the octile bound. Saved next to the grid
+# file it is memory-mapped on load, so worker processes share one copy of the
+# distances without redoing the preprocessing.
+class LandmarkIndex:
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+        self.landmarks = [tuple(cell) for cell in landmarks]
+        # distances[0] holds d(L, v), distances[1] d(v, L), each (landmarks, rows, cols)
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, count=8):
+        landmarks, forward = select_landmarks(graph, count)
+        backward = [cost_to_go_field(graph, cell, reverse=True)[0] for cell in landmarks]
+        distances = np.empty((2, len(landmarks), graph.rows, graph.cols), dtype=np.float32)
+        for i in range(len(landmarks)):
+            distances[0, i] = forward[i]
+            distances[1, i] = backward[i]
+        return cls(graph, landmarks, distances)
+
+    # Metadata identifying the grid and cost model the distances belong to
+    def _metadata(self):
+        graph = self.graph
+        return {
+            'grid_fingerprint': grid_fingerprint(graph.weights),
+            'blocked_fingerprint': None if graph.blocked is None else grid_fingerprint(graph.blocked),
+            'hv_multiplier': graph.hv_multiplier,
+            'diag_multiplier': graph.diag_multiplier,
+        }
+
+    def save(self, grid_path):
+        distances_path, metadata_path = landmark_paths(grid_path)
+        np.save(distances_path, self.distances)
+        metadata = dict(self._metadata(), landmarks=self.landmarks)
+        with open(metadata_path, 'w') as file:
+            json.dump(metadata, file)
+
+    # Memory-map the index saved for grid_path. Returns None when there is none
+    # yet, and raises ValueError when it was built for another grid or cost model.
+    @classmethod
+    def load(cls, graph, grid_path):
+        distances_path, metadata_path = landmark_paths(grid_path)
+        if not (os.path.exists(distances_path) and os.path.exists(metadata_path)):
+            return None
+        with open(metadata_path) as file:
+            metadata = json.load(file)
+        index = cls(graph, metadata.pop('landmarks'), np.load(distances_path, mmap_mode='r'))
+        if metadata != index._metadata():
+            raise ValueError(f"landmarks in {distances_path} were built for a different grid or cost model")
+        return index
+
+    # Load the saved index, or build and save it on first use
+    @classmethod
+    def load_or_build(cls, graph, grid_path, count=8):
+        index = cls.load(graph, grid_path)
+        if index is None:
+            index = cls.build(graph, count)
+            index.save(grid_path)
+        return index
+
+    # Heuristic factory for astar_shortest_path. Only the landmarks' distances
+    # to and from the target are read up front; each expanded cell then costs
+    # 2K scalar lookups, so a query touches the memory-mapped distances only at
+    # the cells it expands. Each stored distance can be off by float32 rounding,
+    # so every bound is lowered by that much to stay admissible. A cell the
+    # landmark reaches while the target is unreachable from it gets an infinite
+    # bound, which is exact: that cell cannot reach the target either. Without
+    # landmarks (a grid with no open cell) this is the octile heuristic.
+    def heuristic(self, graph, target):
+        count = len(self.landmarks)
+        if not count:
+            return octile_heuristic(graph, target)
+        forward = self.distances[0].reshape(count, -1)
+        backward = self.distances[1].reshape(count, -1)
+        from_landmark = [forward.item(i, target) for i in range(count)]
+        to_landmark = [backward.item(i, target) for i in range(count)]
+        octile = octile_heuristic(graph, target)
+        inf = float('inf')
+
+        def heuristic(index):
+            bound = octile(index)
+            for i in range(count):
+                # d(L, t) - d(L, v) and d(v, L) - d(t, L); inf - inf is nan and skipped
+                for a, b in ((from_landmark[i], forward.item(i, index)), (backward.item(i, index), to_landmark[i])):
+                    difference = a - b
+                    if difference == inf:
+                        return inf
+                    if difference > bound:
+                        difference -= FLOAT32_MARGIN * (abs(a) + abs(b))
+                        if difference > bound:
+                            bound = difference
+            return bound
+
+        return heuristic
+
+    def route(self, start, end, stats=None):
+        return astar_shortest_path(self.graph, start, end, stats, self.heuristic)
+
+
+# Example Usage
+if __name__ == "__main__":
+    import math
+    import random
+    import tempfile
+    import time
+    from GridGraph import GridGraph
+
+    rng = random.Random(0)
+    grid = np.array([[rng.choice([2273, 3085, 3735, 5230, 7684, 11275]) for _ in range(400)] for _ in range(400)])
+    grid_path = os.path.join(tempfile.mkdtemp(), 'yard.npy')
+    np.save(grid_path, grid)
+    graph = GridGraph(np.load(grid_path, mmap_mode='r'), 100 / 1000, math.sqrt(2 * 100**2) / 1000)
+
+    start_time = time.time()
+    LandmarkIndex.load_or_build(graph, grid_path, count=8)
+    print(f"Preprocessing: {time.time() - start_time} seconds")
+    index = LandmarkIndex.load(graph, grid_path)
+
+    stats = {}
+    start_time = time.time()
+    length, path = astar_shortest_path(graph, (5, 5), (390, 380), stats)
+    print(f"A*: length {length}, expanded {stats['expanded']}, {time.time() - start_time} seconds")
+
+    stats = {}
+    start_time = time.time()
+    length, path = index.route((5, 5), (390, 380), stats)
+    print(f"ALT: length {length}, expanded {stats['expanded']}, {time.time() - start_time} seconds")
@@ -0,0 +1,247 @@
+import heapq
+import itertools
+import numpy as np
+from GridGraph import MOVES, cost_to_go_field
+
+
+# Space-time reservations of the cranes planned so far, kept in hash tables
+# keyed by single integers instead of a time-expanded graph:
+#   - cells: t * size + cell, the cell a crane occupies at time step t
+#   - moves: (t * size + cell) * 8 + direction code, a crane moving out of cell
+#     between steps t and t + 1
+#   - parked: cell -> the step from which a crane that finished there stays put
+# last_visit keeps the latest step each cell is reserved at, and horizon the
+# latest step anything is reserved at; after the horizon nothing changes.
+class ReservationTable:
+    def __init__(self, size, cols):
+        self.size = size
+        self.cols = cols
+        # Direction code of each (row, column) step; flat offsets would be
+        # ambiguous on grids of one or two columns
+        self.codes = {(dr, dc): code for code, (dr, dc, _) in enumerate(MOVES)}
+        self.cells = {}
+        self.moves = {}
+        self.parked = {}
+        self.last_visit = {}
+        self.horizon = 0
+
+    # Reserve a timed path of flat indices (one cell per time step) for crane
+    # agent; it stays parked on its last cell afterwards
+    def reserve(self, cells, agent):
+        size = self.size
+        for t, index in enumerate(cells):
+            self.cells[t * size + index] = agent
+            if self.last_visit.get(index, -1) < t:
+                self.last_visit[index] = t
+        for t, (u, v) in enumerate(zip(cells, cells[1:])):
+            if u != v:
+                self.moves[(t * size + u) * 8 + self.move_code(u, v)] = agent
+        self.parked[cells[-1]] = len(cells) - 1
+        self.horizon = max(self.horizon, len(cells) - 1)
+
+    # (row, column) step from flat cell u to its neighbour v
+    def step(self, u, v):
+        (ur, uc), (vr, vc) = divmod(u, self.cols), divmod(v, self.cols)
+        return vr - ur, vc - uc
+
+    def move_code(self, u, v):
+        return self.codes[self.step(u, v)]
+
+    def is_free(self, index, t):
+        parked = self.parked.get(index)
+        return (parked is None or t < parked) and t * self.size + index not in self.cells
+
+    # Whether a crane can move u -> v between steps t and t + 1 without
+    # swapping places with another crane or crossing one diagonally
+    def can_move(self, u, v, t):
+        base = t * self.size
+        if (base + v) * 8 + self.move_code(v, u) in self.moves:
+            return False
+        dr, dc = self.step(u, v)
+        if dr and dc:
+            # The other diagonal of the 2x2 block, in either direction
+            a, b = u + dc, u + dr * self.cols
+            if (base + a) * 8 + self.move_code(a, b) in self.moves or (base + b) * 8 + self.move_code(b, a) in self.moves:
+                return False
+        return True
+
+
+# Space-time A* for one crane against the reservation table. A state is a cell
+# at a time step; each step the crane moves to a free neighbour (paying the
+# usual cost of entering it) or waits in place for wait_cost. Time steps after
+# the table's horizon are all alike, so they share one state per cell and the
+# search always terminates. heuristic is the crane's exact cost-to-go field on
+# the empty yard, which keeps the search close to its independent route.
+# Returns (length, timed path of flat indices), (inf, []) when no plan exists.
+def space_time_astar(graph, table, source, target, heuristic, wait_cost, stats=None):
+    size, rows, cols, flat = graph.size, graph.rows, graph.cols, graph.flat
+    if heuristic.item(source) == np.inf or not table.is_free(source, 0):
+        return float('inf'), []
+    last = table.horizon + 1
+    settled = set()
+    reached = {source: (0, 0, None)}
+    counter = itertools.count()
+    # Ties go to the state furthest along in time, which heads for the goal
+    heap = [(heuristic.item(source), 0, next(counter), source)]
+    expanded = 0
+    goal = None
+    while heap:
+        _, _, _, key = heapq.heappop(heap)
+        if key in settled:
+            continue
+        settled.add(key)
+        expanded += 1
+        g, t, _ = reached[key]
+        u = key % size
+        if u == target and t > table.last_visit.get(target, -1):
+            goal = key
+            break
+        r, c = divmod(u, cols)
+        interior = 0 < r < rows - 1 and 0 < c < cols - 1
+        step = min(t + 1, last)
+        candidates = [(u, wait_cost)]
+        for dr, dc, offset, multiplier in graph.moves:
+            if not interior and not (0 <= r + dr < rows and 0 <= c + dc < cols):
+                continue
+            v = u + offset
+            if heuristic.item(v) < np.inf:
+                candidates.append((v, flat.item(v) * multiplier))
+        for v, cost in candidates:
+            next_key = step * size + v
+            if next_key in settled or not table.is_free(v, t + 1):
+                continue
+            if v != u and not table.can_move(u, v, t):
+                continue
+            ng = g + cost
+            if ng < reached.get(next_key, (np.inf,))[0]:
+                reached[next_key] = (ng, t + 1, key)
+                heapq.heappush(heap, (ng + heuristic.item(v), -(t + 1), next(counter), next_key))
+
+    if stats is not None:
+        stats['expanded'] = stats.get('expanded', 0) + expanded
+    if goal is None:
+        return float('inf'), []
+    cells = []
+    key = goal
+    while key is not None:
+        cells.append(key % size)
+        key = reached[key][2]
+    cells.reverse()
+    return reached[goal][0], cells
+
+
+# Collision-free timed paths for several cranes sharing a yard, by prioritized
+# planning: cranes are planned one at a time in priority order (input order by
+# default), each around the reservations of those before it, so no two cranes
+# occupy a cell at the same step, swap cells or cross diagonally, and a crane
+# that has arrived keeps its cell. Prioritized planning can fail where a
+# different order would succeed, so cranes that found no plan are moved to the
+# front and the batch is replanned, up to max_restarts times. A crane that
+# still has no plan after that (or cannot reach its end even on the empty
+# yard) stays parked on its start, and the others are replanned around it.
+#
+# Returns one (length, path) per crane in input order, where path[t] is the
+# crane's cell at time step t (waits repeat a cell) and length includes
+# wait_cost per waiting step; (inf, []) for cranes left without a plan.
+# wait_cost defaults to the cheapest hv move, so idling is never free.
+def plan_cranes(graph, starts, ends, wait_cost=None, priorities=None, max_restarts=3, stats=None):
+    if wait_cost is None:
+        wait_cost = graph.min_weight * graph.hv_multiplier
+    sources = [graph.index(start) for start in starts]
+    targets = [graph.index(end) for end in ends]
+    fields = {}
+    for target in targets:
+        if target not in fields:
+            if graph.is_blocked(target):
+                fields[target] = np.full(graph.size, np.inf)
+            else:
+                fields[target] = cost_to_go_field(graph, graph.cell(target), reverse=True)[0].reshape(-1)
+
+    order = list(priorities) if priorities is not None else list(range(len(starts)))
+    parked = {i for i in order if fields[targets[i]].item(sources[i]) == np.inf}
+    restarts = 0
+    while True:
+        table = ReservationTable(graph.size, graph.cols)
+        for i in parked:
+            table.reserve([sources[i]], i)
+        results = [(float('inf'), [])] * len(starts)
+        failed = []
+        for i in order:
+            if i in parked:
+                continue
+            length, cells = space_time_astar(graph, table, sources[i], targets[i], fields[targets[i]], wait_cost, stats)
+            if cells:
+                table.reserve(cells, i)
+                results[i] = (length, [graph.cell(index) for index in cells])
+            else:
+                failed.append(i)
+        if not failed:
+            break
+        if restarts < max_restarts:
+            restarts += 1
+            order = failed + [i for i in order if i not in failed]
+        else:
+            parked.update(failed)
+    return results
+
+
+# Conflicts between timed paths as (step, crane a, crane b): shared cells
+# (cranes stay on their last cell), swaps and crossing diagonals, the latter
+# two reported at the step the move starts. With starts given, a crane without
+# a path counts as parked on its start; otherwise it is ignored.
+def find_conflicts(paths, starts=None):
+    if starts is not None:
+        paths = [path if path else [start] for path, start in zip(paths, starts)]
+    conflicts = []
+    horizon = max((len(path) for path in paths), default=0)
+    for t in range(horizon):
+        occupied = {}
+        moving = {}
+        for agent, path in enumerate(paths):
+            if not path:
+                continue
+            here = tuple(path[min(t, len(path) - 1)])
+            if here in occupied:
+                conflicts.append((t, occupied[here], agent))
+            occupied[here] = agent
+            there = tuple(path[min(t + 1, len(path) - 1)])
+            if here == there:
+                continue
+            # Swapping cells, or the other diagonal of the same 2x2 block
+            crossings = [(there, here)]
+            if here[0] != there[0] and here[1] != there[1]:
+                a, b = (here[0], there[1]), (there[0], here[1])
+                crossings += [(a, b), (b, a)]
+            for move in crossings:
+                if move in moving:
+                    conflicts.append((t, moving[move], agent))
+            moving[(here, there)] = agent
+    return conflicts
+
+
+# Example Usage
+if __name__ == "__main__":
+    import math
+    import random
+    import time
+    from GridGraph import GridGraph, shortest_path
+
+    rng = random.Random(0)
+    grid = np.array([[rng.choice([2273, 3085, 3735, 5230, 7684, 11275]) for _ in range(200)] for _ in range(200)])
+    grid[60:140, 95:105] = 1000000
+    graph = GridGraph(grid, 100 / 1000, math.sqrt(2 * 100**2) / 1000, blocked_threshold=1000000)
+
+    # Cranes swapping sides of the yard through the gaps around the excavation
+    starts = [(rng.randrange(200), rng.randrange(0, 40)) for _ in range(24)]
+    ends = [(rng.randrange(200), rng.randrange(160, 200)) for _ in range(24)]
+    starts, ends = starts[::2] + ends[1::2], ends[::2] + starts[1::2]
+
+    independent = [shortest_path(graph, start, end)[1] for start, end in zip(starts, ends)]
+    print(f"Independent routes: {len(find_conflicts(independent))} conflicts")
+
+    stats = {}
+    start_time = time.time()
+    results = plan_cranes(graph, starts, ends, stats=stats)
+    print(f"Planned {len(results)} cranes in {time.time() - start_time} seconds, expanded {stats['expanded']}")
+    print(f"Collision-free routes: {len(find_conflicts([path for _, path in results], starts))} conflicts")
+    print(f"Total length: {sum(length for length, _ in results)}")
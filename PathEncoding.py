@@ -0,0 +1,156 @@
+import math
+import numpy as np
+from GridGraph import MOVES
+
+# Direction code of a step that stays on its cell (a wait in a timed path)
+WAIT = len(MOVES)
+
+# Row and column offset of every code, WAIT last
+CODE_ROWS = np.array([dr for dr, _, _ in MOVES] + [0], dtype=np.int32)
+CODE_COLS = np.array([dc for _, dc, _ in MOVES] + [0], dtype=np.int32)
+CODE_DIAGONAL = np.array([diag for _, _, diag in MOVES] + [False])
+
+# Code of each (dr + 1) * 3 + (dc + 1) step; 255 never occurs in a valid path
+_STEP_CODES = np.full(9, 255, dtype=np.uint8)
+for _code, (_dr, _dc, _) in enumerate(MOVES):
+    _STEP_CODES[(_dr + 1) * 3 + _dc + 1] = _code
+_STEP_CODES[4] = WAIT
+
+
+# Compact cell path: the start cell plus one uint8 direction code per step
+# (the MOVES codes, or WAIT for a step that stays put), about one byte a step
+# against ~100 for a list of (row, col) tuples. It reads like the list it
+# encodes (len, indexing, iteration give (row, col) tuples), so existing
+# callers such as visualize_grid_with_paths take it unchanged; the cells are
+# decoded on first access only. An unreachable result, [], encodes to an empty
+# path with start None.
+class EncodedPath:
+    def __init__(self, start, codes):
+        self.start = None if start is None else (int(start[0]), int(start[1]))
+        self.codes = np.asarray(codes, dtype=np.uint8)
+        self._cells = None
+
+    @classmethod
+    def from_cells(cls, path):
+        cells = np.asarray(path, dtype=np.int64).reshape(-1, 2)
+        return cls._from_arrays(cells[:, 0], cells[:, 1])
+
+    # Encode a flat int index path of a grid with cols columns
+    @classmethod
+    def from_indices(cls, indices, cols):
+        rows, columns = np.divmod(np.asarray(indices, dtype=np.int64), cols)
+        return cls._from_arrays(rows, columns)
+
+    @classmethod
+    def _from_arrays(cls, rows, cols):
+        if not len(rows):
+            return cls(None, np.empty(0, dtype=np.uint8))
+        dr, dc = np.diff(rows), np.diff(cols)
+        if len(dr) and (np.abs(dr).max() > 1 or np.abs(dc).max() > 1):
+            raise ValueError("path steps must move to a neighbouring cell or stay put")
+        return cls((rows[0], cols[0]), _STEP_CODES[(dr + 1) * 3 + dc + 1])
+
+    def __len__(self):
+        return 0 if self.start is None else len(self.codes) + 1
+
+    def __bool__(self):
+        return self.start is not None
+
+    # Row and column arrays of every cell, decoded once by a cumulative sum
+    def cells(self):
+        if self._cells is None:
+            if self.start is None:
+                empty = np.empty(0, dtype=np.int32)
+                self._cells = empty, empty
+            else:
+                rows = np.empty(len(self), dtype=np.int32)
+                cols = np.empty(len(self), dtype=np.int32)
+                rows[0], cols[0] = self.start
+                np.cumsum(CODE_ROWS[self.codes], out=rows[1:])
+                np.cumsum(CODE_COLS[self.codes], out=cols[1:])
+                rows[1:] += self.start[0]
+                cols[1:] += self.start[1]
+                self._cells = rows, cols
+        return self._cells
+
+    def __getitem__(self, i):
+        rows, cols = self.cells()
+        if isinstance(i, slice):
+            return list(zip(rows[i].tolist(), cols[i].tolist()))
+        return rows.item(i), cols.item(i)
+
+    def __iter__(self):
+        rows, cols = self.cells()
+        return zip(rows.tolist(), cols.tolist())
+
+    def __eq__(self, other):
+        if isinstance(other, EncodedPath):
+            return self.start == other.start and np.array_equal(self.codes, other.codes)
+        return NotImplemented
+
+    def tolist(self):
+        return list(self)
+
+    # Flat int32 cell indices for a grid with cols columns
+    def indices(self, cols):
+        rows, columns = self.cells()
+        return rows * np.int32(cols) + columns
+
+    # Bytes held by the codes and the start cell (two int64), not counting a
+    # decoded cell cache
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + 16
+
+    # Geometric length: straight steps count hv_multiplier, diagonal ones diag_multiplier
+    def distance(self, hv_multiplier=1, diag_multiplier=math.sqrt(2)):
+        diagonal = np.count_nonzero(CODE_DIAGONAL[self.codes])
+        straight = np.count_nonzero(self.codes < WAIT) - diagonal
+        return straight * hv_multiplier + diagonal * diag_multiplier
+
+    # Travel cost on graph, equal to graph.path_cost of the decoded path: the
+    # running cumsum adds the moves in the same order as path_cost does. A wait
+    # is charged like path_cost charges it (re-entering the cell) unless a
+    # wait_cost is given.
+    def cost(self, graph, wait_cost=None):
+        if len(self) < 2:
+            return 0
+        entered = self.indices(graph.cols)[1:]
+        costs = graph.flat[entered] * np.where(CODE_DIAGONAL[self.codes], graph.diag_multiplier, graph.hv_multiplier)
+        if wait_cost is not None:
+            costs = np.where(self.codes == WAIT, wait_cost, costs)
+        return np.cumsum(costs).item(-1)
+
+
+# Pack many paths into three flat arrays for np.savez or transmission: the
+# start cells (n, 2; -1 for empty paths), the offset of each path's codes
+# (n + 1) and all codes back to back
+def pack_paths(paths):
+    encoded = [path if isinstance(path, EncodedPath) else EncodedPath.from_cells(path) for path in paths]
+    starts = np.array([path.start or (-1, -1) for path in encoded], dtype=np.int32).reshape(-1, 2)
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(path.codes) for path in encoded])
+    codes = np.concatenate([path.codes for path in encoded]) if encoded else np.empty(0, dtype=np.uint8)
+    return starts, offsets, codes
+
+
+def unpack_paths(starts, offsets, codes):
+    return [EncodedPath(None if start[0] < 0 else start, codes[offsets[i]:offsets[i + 1]])
+            for i, start in enumerate(starts.tolist())]
+
+
+# Example Usage
+if __name__ == "__main__":
+    import pickle
+    import random
+    from GridGraph import GridGraph, shortest_path
+
+    rng = random.Random(0)
+    grid = np.array([[rng.choice([2273, 3085, 3735, 5230, 7684, 11275]) for _ in range(300)] for _ in range(300)])
+    graph = GridGraph(grid, 100 / 1000, math.sqrt(2 * 100**2) / 1000)
+
+    length, path = shortest_path(graph, (3, 5), (290, 280))
+    encoded = EncodedPath.from_cells(path)
+    print(f"{len(path)} cells: {len(pickle.dumps(path))} bytes pickled as tuples, {encoded.nbytes} bytes encoded")
+    print(f"Length {length}, recomputed {encoded.cost(graph)}, distance {encoded.distance(100 / 1000, math.sqrt(2 * 100**2) / 1000)}")
+    print(f"Round trip: {encoded.tolist() == path}")
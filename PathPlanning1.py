@@ -1,5 +1,7 @@
 import networkx as nx
 import time
+from GridGraph import GridGraph, bidirectional_shortest_path, cost_to_go_field
+from RouteRendering import RouteRenderer, draw_grid_with_paths
 
 # print("Hello, World!")
 # import numpy as np
@@ -39,33 +41,17 @@ def create_graph_from_grid(grid):
                 G.add_edge((r - 1, c - 1), (r, c), weight=grid[r][c])
     return G
 
-# Visualize the grid with the shortest path
-def visualize_grid_with_path(grid, start, end, path):
-    rows, cols = len(grid), len(grid[0])
-    fig, ax = plt.subplots()
-    ax.set_xticks(range(cols))
-    ax.set_yticks(range(rows))
-    ax.set_xticklabels([])
-    ax.set_yticklabels([])
-    ax.grid(True)
-    
-    for r in range(rows):
-        for c in range(cols):
-            ax.text(c, r, grid[r][c], va='center', ha='center')
-
-    # Highlight the start and end points
-    ax.add_patch(plt.Circle((start[1], start[0]), 0.15, color='green', label='Start'))
-    ax.add_patch(plt.Circle((end[1], end[0]), 0.15, color='red', label='End'))
-
-    # Draw the path
-    if path:
-        for i in range(len(path) - 1):
-            r1, c1 = path[i]
-            r2, c2 = path[i + 1]
-            ax.plot([c1, c2], [r1, r2], color='blue', linewidth=2)
+# Headless route maps are drawn on one reused Agg figure
+route_renderer = RouteRenderer()
 
-    plt.gca().invert_yaxis()
-    plt.legend(loc='upper right')
+# Visualize the grid with the shortest path; with output set the map is written
+# to that file (.png, .svg) instead of shown, which needs no display
+def visualize_grid_with_path(grid, start, end, path, output=None):
+    if output is not None:
+        route_renderer.render(output, grid, [start], [end], [path] if path else [])
+        return
+    fig, ax = plt.subplots()
+    draw_grid_with_paths(ax, grid, [start], [end], [path] if path else [])
     plt.show()
 
 # Find the shortest path using Dijkstra's algorithm in networkx
@@ -77,6 +63,16 @@ def dijkstra_shortest_path_networkx(grid, start, end):
     except nx.NetworkXNoPath:
         return -1, []
 
+# Travel cost from start to every cell as a dense array, plus a direction field
+# from which the path to any cell is read off with path_from_field
+def cost_to_go_from_start(grid, start):
+    return cost_to_go_field(GridGraph(grid), start)
+
+# Same result as dijkstra_shortest_path_networkx, searched from both ends at once;
+# on long cross-site walks the two frontiers meet after settling far fewer cells
+def bidirectional_shortest_path_grid(grid, start, end):
+    return bidirectional_shortest_path(GridGraph(grid), start, end)
+
 # Example usage:
 grid = [
     # [1,1,1,1,1,1,1000000,1000000,1000000,1000000,1000000,1000000,1,1],
@@ -108,14 +104,16 @@ grid = [
 
 start = (11, 4)
 end = (7, 6)
+plot_output = None  # e.g. 'route.png' to write the route map instead of showing plots
 
 
 # Visualize the grid
-plt.imshow(grid, cmap='Blues', origin='lower')
-plt.scatter(start[1], start[0], color='green', label='Start')
-plt.scatter(end[1], end[0], color='red', label='End')
-plt.legend(loc='upper right')
-plt.show()
+if plot_output is None:
+    plt.imshow(grid, cmap='Blues', origin='lower')
+    plt.scatter(start[1], start[0], color='green', label='Start')
+    plt.scatter(end[1], end[0], color='red', label='End')
+    plt.legend(loc='upper right')
+    plt.show()
 
 
 
@@ -132,6 +130,6 @@ print(f"Runtime: {runtime} seconds")
 
 
 # Visualize the grid with the shortest path
-visualize_grid_with_path(grid, start, end, path)
+visualize_grid_with_path(grid, start, end, path, plot_output)
 
 
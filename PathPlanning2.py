@@ -1,6 +1,16 @@
 import networkx as nx
 import matplotlib.pyplot as plt
 import math
+from GridGraph import GridGraph, shortest_path
+from RoutingSession import RoutingSession
+from AnyAngle import smooth_path
+from MultiCranePlanning import plan_cranes
+from RouteRendering import RouteRenderer, draw_grid_with_paths
+
+# Graphs built for one batch are reused by later batches on the same grid
+routing_session = RoutingSession()
+# Headless route maps are drawn on one reused Agg figure
+route_renderer = RouteRenderer()
 
 # Step 2: Create the Graph from Grid with weight multipliers
 def create_graph_from_grid(grid, hv_multiplier, diag_multiplier):
@@ -29,56 +39,53 @@ def create_graph_from_grid(grid, hv_multiplier, diag_multiplier):
     return G
 
 # Step 3: Compute Shortest Paths
-def compute_shortest_paths(grid, start, end, hv_multiplier, diag_multiplier):
-    G = create_graph_from_grid(grid, hv_multiplier, diag_multiplier)
-    try:
-        length, path = nx.single_source_dijkstra(G, start, end)
-        return length, path
-    except nx.NetworkXNoPath:
-        return float('inf'), []
+# method='astar' finds the same optimal path while expanding fewer cells; pass a
+# stats dict to get the number of expanded cells back under 'expanded'.
+# Cells in the blocked mask or weighing blocked_threshold or more are never entered.
+def compute_shortest_paths(grid, start, end, hv_multiplier, diag_multiplier, method='dijkstra', stats=None,
+                           blocked=None, blocked_threshold=None):
+    graph = GridGraph(grid, hv_multiplier, diag_multiplier, blocked, blocked_threshold)
+    return shortest_path(graph, start, end, method, stats)
 
 # Step 4: Combine and Visualize Paths
-def find_and_visualize_paths(grid, starts, ends, hv_multiplier, diag_multiplier):
+# With any_angle=True each path is cut down to the waypoints of straight segments
+# that cost no more than the cells they replace (see AnyAngle.smooth_path).
+# With collision_free=True the cranes are planned together so no two share a cell
+# at the same time step; path[t] is then a crane's cell at step t, waits included
+# (see MultiCranePlanning.plan_cranes). Timed paths cannot be smoothed.
+# With output set the map is written to that file (.png, .svg) instead of shown.
+def find_and_visualize_paths(grid, starts, ends, hv_multiplier, diag_multiplier, session=None, method='dijkstra',
+                             blocked=None, blocked_threshold=None, any_angle=False, collision_free=False, output=None):
+    session = session or routing_session
     paths = []
     total_length = 0
+    if any_angle and collision_free:
+        raise ValueError("any_angle and collision_free cannot be combined")
     
-    for start, end in zip(starts, ends):
-        length, path = compute_shortest_paths(grid, start, end, hv_multiplier, diag_multiplier)
+    if collision_free:
+        graph = session.graph_for(grid, hv_multiplier, diag_multiplier, blocked=blocked, blocked_threshold=blocked_threshold)
+        results = plan_cranes(graph, starts, ends)
+    else:
+        results = session.route_many(grid, starts, ends, hv_multiplier, diag_multiplier, method,
+                                     blocked=blocked, blocked_threshold=blocked_threshold)
+    if any_angle:
+        graph = session.graph_for(grid, hv_multiplier, diag_multiplier, blocked=blocked, blocked_threshold=blocked_threshold)
+        results = [smooth_path(graph, path) if path else (length, path) for length, path in results]
+    for length, path in results:
         paths.append(path)
         total_length += length
     
-    visualize_grid_with_paths(grid, starts, ends, paths)
+    visualize_grid_with_paths(grid, starts, ends, paths, output)
     return total_length, paths
 
 # Step 5: Visualize the Grid and Paths
-def visualize_grid_with_paths(grid, starts, ends, paths):
-    rows, cols = len(grid), len(grid[0])
+# Writing to output needs no display and never blocks on plt.show()
+def visualize_grid_with_paths(grid, starts, ends, paths, output=None):
+    if output is not None:
+        route_renderer.render(output, grid, starts, ends, paths, fontsize=5)
+        return
     fig, ax = plt.subplots()
-    ax.set_xticks(range(cols))
-    ax.set_yticks(range(rows))
-    ax.set_xticklabels([])
-    ax.set_yticklabels([])
-    ax.grid(True)
-    
-    for r in range(rows):
-        for c in range(cols):
-            ax.text(c, r, grid[r][c], va='center', ha='center', fontsize=5)
-
-    # Highlight the start and end points
-    for start in starts:
-        ax.add_patch(plt.Circle((start[1], start[0]), 0.1, color='green', label='Start'))
-    for end in ends:
-        ax.add_patch(plt.Circle((end[1], end[0]), 0.1, color='red', label='End'))
-
-    # Draw the paths
-    for path in paths:
-        for i in range(len(path) - 1):
-            r1, c1 = path[i]
-            r2, c2 = path[i + 1]
-            ax.plot([c1, c2], [r1, r2], color='blue', linewidth=2)
-
-    plt.gca().invert_yaxis()
-    plt.legend(loc='upper right')
+    draw_grid_with_paths(ax, grid, starts, ends, paths, fontsize=5)
     plt.show()
 
 # Example Usage
@@ -116,8 +123,11 @@ starts = [(0,12), (8,12), (11,4), (0,4)]
 ends = [(4,8), (6,9), (7,6), (5,5)]
 hv_multiplier = 100/1000
 diag_multiplier = math.sqrt(2*100**2)/1000
+blocked_threshold = 1000000  # Existing structures and excavations are no-go areas
+plot_output = None  # e.g. 'routes.png' to write the route map instead of showing it
 
-total_length, paths = find_and_visualize_paths(grid, starts, ends, hv_multiplier, diag_multiplier)
+total_length, paths = find_and_visualize_paths(grid, starts, ends, hv_multiplier, diag_multiplier,
+                                               blocked_threshold=blocked_threshold, output=plot_output)
 print(f"Total path length: {total_length}")
 for i, path in enumerate(paths):
     print(f"Path {i+1}: {path}")
\ No newline at end of file
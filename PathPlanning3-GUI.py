@@ -1,8 +1,15 @@
 import tkinter as tk
-from tkinter import simpledialog, messagebox
+from tkinter import simpledialog, messagebox, filedialog
 import networkx as nx
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import numpy as np
+from GridGraph import GridGraph, shortest_path
+from RoutingSession import RoutingSession
+from Replanning import DStarLite
+from AnytimePlanning import anytime_shortest_path
+from GridIO import load_grid, save_grid
+from RouteRendering import draw_grid_with_paths
 
 class GridPathFinder:
     def __init__(self, root):
@@ -22,6 +29,8 @@ class GridPathFinder:
         self.cols_entry.grid(row=0, column=3)
         
         tk.Button(self.root, text="Create Grid", command=self.create_grid).grid(row=0, column=4)
+        tk.Button(self.root, text="Load Grid", command=self.load_grid_file).grid(row=0, column=5)
+        tk.Button(self.root, text="Save Grid", command=self.save_grid_file).grid(row=0, column=6)
         
         self.grid_frame = tk.Frame(self.root)
         self.grid_frame.grid(row=1, column=0, columnspan=5)
@@ -31,12 +40,26 @@ class GridPathFinder:
         
         self.hv_multiplier = 1
         self.diag_multiplier = 1
+        self.blocked_threshold = None
+        # Seconds find_paths may spend per route; None searches to the optimum
+        self.time_budget = None
+        # Cell size and origin of a loaded grid, written back by "Save Grid"
+        self.cell_size = None
+        self.origin = (0, 0)
+
+        # Reuses the routing graph across clicks while the weights are unchanged
+        self.session = RoutingSession()
+        # D* Lite planners per pair, repaired in place by "Replan Edits"
+        self.replanners = {}
+        self.planned_grid = None
     
     def create_grid(self):
         rows = int(self.rows_entry.get())
         cols = int(self.cols_entry.get())
         
         self.grid = [[0 for _ in range(cols)] for _ in range(rows)]
+        self.forget_plans()
+        self.entries = [[None for _ in range(cols)] for _ in range(rows)]
         
         for widget in self.grid_frame.winfo_children():
             widget.destroy()
@@ -45,22 +68,59 @@ class GridPathFinder:
             for c in range(cols):
                 entry = tk.Entry(self.grid_frame, width=5)
                 entry.grid(row=r, column=c)
-                self.grid[r][c] = entry
+                self.entries[r][c] = entry
         
         tk.Button(self.root, text="Set Weights", command=self.set_weights).grid(row=2, column=0, columnspan=2)
         tk.Button(self.root, text="Add Start Point", command=self.add_start_point).grid(row=2, column=2)
         tk.Button(self.root, text="Add End Point", command=self.add_end_point).grid(row=2, column=3)
         tk.Button(self.root, text="Set Multipliers", command=self.set_multipliers).grid(row=2, column=4)
-        tk.Button(self.root, text="Find Paths", command=self.find_paths).grid(row=3, column=0, columnspan=5)
+        tk.Button(self.root, text="Set Blocked Threshold", command=self.set_blocked_threshold).grid(row=3, column=0)
+        tk.Button(self.root, text="Set Time Budget", command=self.set_time_budget).grid(row=3, column=1)
+        tk.Button(self.root, text="Find Paths", command=self.find_paths).grid(row=3, column=2)
+        tk.Button(self.root, text="Replan Edits", command=self.replan_edits).grid(row=3, column=3, columnspan=2)
     
     def set_weights(self):
         for r in range(len(self.grid)):
             for c in range(len(self.grid[0])):
+                text = self.entries[r][c].get()
                 try:
-                    self.grid[r][c] = int(self.grid[r][c].get())
+                    self.grid[r][c] = int(text)
                 except ValueError:
-                    messagebox.showerror("Invalid Input", f"Invalid weight at ({r}, {c})")
-                    return
+                    try:
+                        self.grid[r][c] = float(text)
+                    except ValueError:
+                        messagebox.showerror("Invalid Input", f"Invalid weight at ({r}, {c})")
+                        return False
+        return True
+
+    # Fill the grid, multipliers and blocked threshold from a .npy/.npz cost grid
+    def load_grid_file(self):
+        path = filedialog.askopenfilename(filetypes=[("Cost grids", "*.npy *.npz")])
+        if not path:
+            return
+        grid, metadata = load_grid(path, mmap=False)
+        self.rows_entry.delete(0, tk.END)
+        self.rows_entry.insert(0, str(grid.shape[0]))
+        self.cols_entry.delete(0, tk.END)
+        self.cols_entry.insert(0, str(grid.shape[1]))
+        self.create_grid()
+        for r, row in enumerate(grid.tolist()):
+            for c, weight in enumerate(row):
+                self.entries[r][c].insert(0, str(weight))
+        self.hv_multiplier = metadata['hv_multiplier']
+        self.diag_multiplier = metadata['diag_multiplier']
+        self.blocked_threshold = metadata['blocked_threshold']
+        self.cell_size = metadata['cell_size']
+        self.origin = tuple(metadata['origin'])
+
+    def save_grid_file(self):
+        if not self.set_weights():
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".npy", filetypes=[("Cost grids", "*.npy *.npz")])
+        if not path:
+            return
+        save_grid(path, self.grid, self.cell_size, self.origin, self.hv_multiplier, self.diag_multiplier,
+                  self.blocked_threshold)
     
     def add_start_point(self):
         row = simpledialog.askinteger("Input", "Start Row:")
@@ -75,6 +135,23 @@ class GridPathFinder:
     def set_multipliers(self):
         self.hv_multiplier = float(simpledialog.askfloat("Input", "HV Multiplier:"))
         self.diag_multiplier = float(simpledialog.askfloat("Input", "Diagonal Multiplier:"))
+        self.forget_plans()
+
+    def set_blocked_threshold(self):
+        # Cells weighing this much or more are treated as no-go areas; cancel to clear it
+        self.blocked_threshold = simpledialog.askfloat("Input", "Blocked Weight Threshold:")
+        self.forget_plans()
+
+    # Drop the D* Lite planners: they only hear of the edits made while their
+    # cost model is current, so after a new grid, multipliers or threshold the
+    # next "Replan Edits" must plan from scratch
+    def forget_plans(self):
+        self.replanners = {}
+        self.planned_grid = None
+
+    def set_time_budget(self):
+        # Anytime search: a quick bounded-suboptimal route, improved until the budget runs out; cancel to clear it
+        self.time_budget = simpledialog.askfloat("Input", "Time Budget per Route (seconds):")
     
     def create_graph_from_grid(self, grid, hv_multiplier=1, diag_multiplier=1):
         G = nx.DiGraph()
@@ -101,21 +178,65 @@ class GridPathFinder:
                     G.add_edge((r - 1, c - 1), (r, c), weight=grid[r][c] * diag_multiplier)
         return G
 
-    def compute_shortest_paths(self, grid, start, end, hv_multiplier=1, diag_multiplier=1):
-        G = self.create_graph_from_grid(grid, hv_multiplier, diag_multiplier)
-        try:
-            length, path = nx.single_source_dijkstra(G, start, end)
-            return length, path
-        except nx.NetworkXNoPath:
-            return float('inf'), []
+    def compute_shortest_paths(self, grid, start, end, hv_multiplier=1, diag_multiplier=1, method='dijkstra', stats=None,
+                               blocked=None, blocked_threshold=None):
+        graph = GridGraph(grid, hv_multiplier, diag_multiplier, blocked, blocked_threshold)
+        return shortest_path(graph, start, end, method, stats)
 
     def find_paths(self):
-        self.set_weights()
+        if not self.set_weights():
+            return
+        self.forget_plans()
+        self.planned_grid = [row[:] for row in self.grid]
+        if self.time_budget is not None:
+            self.find_paths_anytime()
+            return
+        results = self.session.route_many(self.grid, self.start_coords, self.end_coords, self.hv_multiplier, self.diag_multiplier,
+                                          blocked_threshold=self.blocked_threshold)
+        self.show_results(results)
+
+    def find_paths_anytime(self):
+        graph = self.session.graph_for(self.grid, self.hv_multiplier, self.diag_multiplier,
+                                       blocked_threshold=self.blocked_threshold)
+        results = []
+        for i, (start, end) in enumerate(zip(self.start_coords, self.end_coords)):
+            length, path, bound = anytime_shortest_path(graph, start, end, self.time_budget)
+            print(f"Path {i+1} is within {bound:.3f}x of the optimum")
+            results.append((length, path))
+        self.show_results(results)
+
+    # Re-read the weights and repair each route from the cells edited since the
+    # last plan, instead of searching the whole grid again
+    def replan_edits(self):
+        if self.planned_grid is None or len(self.planned_grid) != len(self.grid) or len(self.planned_grid[0]) != len(self.grid[0]):
+            self.find_paths()
+            return
+        if not self.set_weights():
+            return
+        changes = [((r, c), self.grid[r][c]) for r in range(len(self.grid)) for c in range(len(self.grid[0]))
+                   if self.grid[r][c] != self.planned_grid[r][c]]
+        self.planned_grid = [row[:] for row in self.grid]
+
+        results = []
+        for start, end in zip(self.start_coords, self.end_coords):
+            key = (start, end, self.hv_multiplier, self.diag_multiplier, self.blocked_threshold)
+            planner = self.replanners.get(key)
+            if planner is None:
+                graph = GridGraph(np.array(self.grid), self.hv_multiplier, self.diag_multiplier,
+                                  blocked_threshold=self.blocked_threshold)
+                if graph.is_blocked(graph.index(start)) or graph.is_blocked(graph.index(end)):
+                    results.append((float('inf'), []))
+                    continue
+                planner = self.replanners[key] = DStarLite(graph, start, end)
+                results.append(planner.plan())
+            else:
+                results.append(planner.update_cells(changes))
+        self.show_results(results)
+
+    def show_results(self, results):
         paths = []
         total_length = 0
-        
-        for start, end in zip(self.start_coords, self.end_coords):
-            length, path = self.compute_shortest_paths(self.grid, start, end, self.hv_multiplier, self.diag_multiplier)
+        for length, path in results:
             paths.append(path)
             total_length += length
         
@@ -125,33 +246,8 @@ class GridPathFinder:
             print(f"Path {i+1}: {path}")
 
     def visualize_grid_with_paths(self, grid, starts, ends, paths):
-        rows, cols = len(grid), len(grid[0])
         fig, ax = plt.subplots()
-        ax.set_xticks(range(cols))
-        ax.set_yticks(range(rows))
-        ax.set_xticklabels([])
-        ax.set_yticklabels([])
-        ax.grid(True)
-        
-        for r in range(rows):
-            for c in range(cols):
-                ax.text(c, r, grid[r][c], va='center', ha='center')
-
-        # Highlight the start and end points
-        for start in starts:
-            ax.add_patch(plt.Circle((start[1], start[0]), 0.2, color='green', label='Start'))
-        for end in ends:
-            ax.add_patch(plt.Circle((end[1], end[0]), 0.2, color='red', label='End'))
-
-        # Draw the paths
-        for path in paths:
-            for i in range(len(path) - 1):
-                r1, c1 = path[i]
-                r2, c2 = path[i + 1]
-                ax.plot([c1, c2], [r1, r2], color='blue', linewidth=2)
-
-        plt.gca().invert_yaxis()
-        plt.legend(loc='upper right')
+        draw_grid_with_paths(ax, grid, starts, ends, paths)
 
         # Embedding the plot in tkinter
         canvas = FigureCanvasTkAgg(fig, master=self.root)
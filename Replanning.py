@@ -0,0 +1,146 @@
+import heapq
+import numpy as np
+from GridGraph import octile_distance
+
+
+# Incremental replanner (D* Lite) for one start/goal pair on a GridGraph whose
+# weights change while cranes are working. The search runs backwards from the
+# goal and keeps its g/rhs values between calls, so after update_cells only
+# the cells whose cost-to-goal actually changed are re-expanded.
+#
+# The octile heuristic is scaled by the cheapest open weight when the planner is
+# created; a change that drops a weight below that floor would make it
+# inadmissible, so such an update restarts the search from scratch instead.
+class DStarLite:
+    def __init__(self, graph, start, goal):
+        self.graph = graph
+        self.goal = graph.index(goal)
+        self.start = graph.index(start)
+        self.reset()
+
+    def reset(self):
+        graph = self.graph
+        self.g = np.full(graph.size, np.inf)
+        self.rhs = np.full(graph.size, np.inf)
+        self.queued = {}
+        self.heap = []
+        self.km = 0
+        self.last_start = self.start
+        self.heuristic_weight = graph.min_weight * (1 - 1e-12)
+        self.rhs[self.goal] = 0
+        self._push(self.goal)
+
+    def _heuristic(self, a, b):
+        cols = self.graph.cols
+        (ar, ac), (br, bc) = divmod(a, cols), divmod(b, cols)
+        return self.heuristic_weight * octile_distance(
+            ar - br, ac - bc, self.graph.hv_multiplier, self.graph.diag_multiplier)
+
+    def _key(self, u):
+        best = min(self.g.item(u), self.rhs.item(u))
+        return (best + self._heuristic(self.start, u) + self.km, best)
+
+    def _push(self, u):
+        key = self._key(u)
+        self.queued[u] = key
+        heapq.heappush(self.heap, (key, u))
+
+    # Cost of moving from u into v, inf when either cell is blocked
+    def _cost(self, u, v, multiplier):
+        graph = self.graph
+        if graph.is_blocked(u) or graph.is_blocked(v):
+            return np.inf
+        return graph.flat.item(v) * multiplier
+
+    # Neighbours of u with the move multiplier; moves are symmetric on the grid,
+    # so these are both the successors and the predecessors of u
+    def _adjacent(self, u):
+        rows, cols = self.graph.rows, self.graph.cols
+        r, c = divmod(u, cols)
+        for dr, dc, offset, multiplier in self.graph.moves:
+            if 0 <= r + dr < rows and 0 <= c + dc < cols:
+                yield u + offset, multiplier
+
+    def _update_vertex(self, u):
+        if u != self.goal:
+            g = self.g
+            self.rhs[u] = min((self._cost(u, v, m) + g.item(v) for v, m in self._adjacent(u)), default=np.inf)
+        self.queued.pop(u, None)
+        if self.g.item(u) != self.rhs.item(u):
+            self._push(u)
+
+    def _top_key(self):
+        heap, queued = self.heap, self.queued
+        while heap and queued.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else (np.inf, np.inf)
+
+    def _compute_shortest_path(self):
+        expanded = 0
+        g, rhs = self.g, self.rhs
+        while self._top_key() < self._key(self.start) or rhs.item(self.start) > g.item(self.start):
+            key, u = heapq.heappop(self.heap)
+            del self.queued[u]
+            new_key = self._key(u)
+            if key < new_key:
+                self._push(u)
+                continue
+            expanded += 1
+            if g.item(u) > rhs.item(u):
+                g[u] = rhs.item(u)
+                for v, _ in self._adjacent(u):
+                    self._update_vertex(v)
+            else:
+                g[u] = np.inf
+                self._update_vertex(u)
+                for v, _ in self._adjacent(u):
+                    self._update_vertex(v)
+        return expanded
+
+    # Follow the cheapest successor from the start to the goal
+    def _extract_path(self):
+        graph, g = self.graph, self.g
+        if self.rhs.item(self.start) == np.inf:
+            return []
+        path = [graph.cell(self.start)]
+        u = self.start
+        while u != self.goal and len(path) <= graph.size:
+            u = min(self._adjacent(u), key=lambda item: self._cost(u, item[0], item[1]) + g.item(item[0]))[0]
+            path.append(graph.cell(u))
+        return path
+
+    # Bring the route up to date and return (length, path); when a stats dict
+    # is passed the number of re-expanded cells is accumulated under 'expanded'
+    def plan(self, stats=None):
+        expanded = self._compute_shortest_path()
+        if stats is not None:
+            stats['expanded'] = stats.get('expanded', 0) + expanded
+        # A blocked start or goal has no route, even onto itself
+        if self.graph.is_blocked(self.start) or self.graph.is_blocked(self.goal):
+            return float('inf'), []
+        path = self._extract_path()
+        if not path:
+            return float('inf'), []
+        return self.graph.path_cost(path), path
+
+    # The crane has moved along its route; later repairs are keyed from here
+    def move_start(self, start):
+        start = self.graph.index(start)
+        self.km += self._heuristic(self.last_start, start)
+        self.last_start = self.start = start
+
+    # Apply ((row, col), weight) changes to the graph and repair the route.
+    # A weight of None closes the cell (see GridGraph.update_weights).
+    def update_cells(self, changes, stats=None):
+        changes = list(changes)
+        self.graph.update_weights(changes)
+        if self.graph.min_weight * (1 - 1e-12) < self.heuristic_weight:
+            self.reset()
+            return self.plan(stats)
+        for cell, _ in changes:
+            changed = self.graph.index(cell)
+            # Moves into the cell change cost, and moves out of it too when it opens or closes
+            self._update_vertex(changed)
+            for u, _ in self._adjacent(changed):
+                self._update_vertex(u)
+        return self.plan(stats)
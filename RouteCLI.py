@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+import sys
+import time
+from GridGraph import SEARCH_METHODS, shortest_path
+from GridIO import load_grid
+from PathEncoding import EncodedPath
+from RoutingSession import RoutingSession
+from TiledGrid import TiledGraph, TiledGrid, tiled_astar_shortest_path
+
+
+# Headless batch routing: load a cost grid once, read route jobs as JSON lines
+# and write one JSON result line per job as soon as it is computed, so any
+# number of jobs can be piped through in constant memory. Example:
+#
+#   python RouteCLI.py yard.npy --jobs jobs.jsonl --method astar > results.jsonl
+#
+# A job is {"start": [r, c], "end": [r, c]} with optional "id",
+# "hv_multiplier", "diag_multiplier" and "method"; the grid file's metadata
+# supplies the default multipliers and blocked threshold. A result is
+# {"id", "length", "path", "seconds"}, length being null when the end cannot
+# be reached; a job that cannot be run gets {"id", "error"} and the batch
+# carries on. For parallel runs start several processes on the same .npy
+# file: it is memory-mapped, so they share one copy of the grid.
+
+
+# Router for a grid file (.npy/.npz) or a TiledGrid directory: a function
+# routing (start, end, hv_multiplier, diag_multiplier, method) -> (length, path),
+# plus the file's metadata
+def open_router(grid_path, blocked_threshold=None, max_tiles=64):
+    if os.path.isdir(grid_path):
+        store = TiledGrid(grid_path, max_tiles)
+        metadata = store.metadata
+        graphs = {}
+
+        def route(start, end, hv_multiplier, diag_multiplier, method):
+            if method != 'astar':
+                raise ValueError(f"tiled grids are routed with astar, not {method}")
+            key = (hv_multiplier, diag_multiplier)
+            if key not in graphs:
+                graphs[key] = TiledGraph(store, hv_multiplier, diag_multiplier, blocked_threshold)
+            return tiled_astar_shortest_path(graphs[key], start, end)
+
+        return route, metadata
+
+    grid, metadata = load_grid(grid_path)
+    # The grid is read-only for the whole run, so its path identifies it without
+    # hashing (and so paging in) every weight
+    fingerprint = os.path.abspath(grid_path)
+    threshold = metadata['blocked_threshold'] if blocked_threshold is None else blocked_threshold
+    session = RoutingSession()
+
+    def route(start, end, hv_multiplier, diag_multiplier, method):
+        graph = session.graph_for(grid, hv_multiplier, diag_multiplier, fingerprint, blocked_threshold=threshold)
+        return shortest_path(graph, start, end, method)
+
+    return route, metadata
+
+
+# Run the jobs read from lines and yield one result dict per job, in order.
+# path_format is 'cells' ([[r, c], ...]), 'codes' (start cell plus one
+# PathEncoding direction digit per step) or 'none'.
+def route_jobs(route, metadata, lines, method='dijkstra', path_format='cells'):
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        job_id = number
+        try:
+            job = json.loads(line)
+            job_id = job.get('id', number)
+            hv_multiplier = job.get('hv_multiplier', metadata['hv_multiplier'])
+            diag_multiplier = job.get('diag_multiplier', metadata['diag_multiplier'])
+            job_method = job.get('method', method)
+            if job_method not in SEARCH_METHODS:
+                raise ValueError(f"unknown search method {job_method}")
+            start_time = time.perf_counter()
+            length, path = route(tuple(job['start']), tuple(job['end']), hv_multiplier, diag_multiplier, job_method)
+            seconds = time.perf_counter() - start_time
+        except KeyError as error:
+            yield {'id': job_id, 'error': f"job has no {error}"}
+            continue
+        except (ValueError, TypeError, AttributeError) as error:
+            yield {'id': job_id, 'error': str(error) or type(error).__name__}
+            continue
+
+        result = {'id': job_id, 'length': None if length == float('inf') else length, 'seconds': seconds}
+        if path_format == 'cells':
+            result['path'] = [list(cell) for cell in path]
+        elif path_format == 'codes':
+            encoded = EncodedPath.from_cells(path)
+            result['path'] = {'start': list(encoded.start), 'codes': ''.join(map(str, encoded.codes.tolist()))} if path else None
+        yield result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Route JSON-lines jobs on a cost grid and stream the results")
+    parser.add_argument('grid', help="grid file (.npy, .npz) or TiledGrid directory")
+    parser.add_argument('--jobs', help="JSON-lines job file (default: stdin)")
+    parser.add_argument('--output', help="JSON-lines result file (default: stdout)")
+    parser.add_argument('--method', default='dijkstra', choices=sorted(SEARCH_METHODS),
+                        help="default search method for jobs that do not name one")
+    parser.add_argument('--blocked-threshold', type=float, help="override the grid file's blocked threshold")
+    parser.add_argument('--path-format', default='cells', choices=['cells', 'codes', 'none'])
+    parser.add_argument('--max-tiles', type=int, default=64, help="tile cache size for a TiledGrid directory")
+    args = parser.parse_args(argv)
+
+    route, metadata = open_router(args.grid, args.blocked_threshold, args.max_tiles)
+    method = 'astar' if os.path.isdir(args.grid) else args.method
+    jobs = open(args.jobs) if args.jobs else sys.stdin
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for result in route_jobs(route, metadata, jobs, method, args.path_format):
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+    finally:
+        if args.jobs:
+            jobs.close()
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+from collections import OrderedDict
+import numpy as np
+from GridGraph import GridGraph, index_dtype, shortest_path
+
+
+# Vectorized octile lower bound on the cost of covering (dr, dc) displacements,
+# the array form of GridGraph.octile_distance
+def _octile_bounds(dr, dc, hv_multiplier, diag_multiplier):
+    dr, dc = np.abs(dr), np.abs(dc)
+    low, high = np.minimum(dr, dc), np.maximum(dr, dc)
+    return np.minimum(np.minimum(hv_multiplier * (high - low) + diag_multiplier * low, diag_multiplier * high),
+                      hv_multiplier * (dr + dc))
+
+
+# LRU cache of routed (start, end, hv_multiplier, diag_multiplier, method)
+# results on a grid that changes in small patches. Changes go through
+# update_cells, which keeps an entry unless
+#   - a changed cell lies on its path, or
+#   - a cell got cheaper (or opened) inside the entry's corridor: the cells x
+#     whose octile lower bound start -> x -> end is below the cached length,
+#     i.e. the only cells through which a shorter path could now run.
+# Cells getting dearer off the path cannot change an optimal route. Unreachable
+# results are dropped whenever any cell gets cheaper. hits, misses,
+# invalidations and evictions are counted for sizing max_entries.
+class RouteCache:
+    def __init__(self, grid, max_entries=1024, blocked=None, blocked_threshold=None):
+        weights = np.array(grid)
+        self.base = GridGraph(weights, blocked=blocked, blocked_threshold=blocked_threshold)
+        self.max_entries = max_entries
+        self.graphs = {}
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def graph_for(self, hv_multiplier, diag_multiplier):
+        key = (hv_multiplier, diag_multiplier)
+        graph = self.graphs.get(key)
+        if graph is None:
+            base = self.base
+            blocked = None if base.blocked is None else base.blocked.reshape(base.rows, base.cols)
+            graph = self.graphs[key] = GridGraph(base.weights, hv_multiplier, diag_multiplier, blocked)
+        return graph
+
+    def route(self, start, end, hv_multiplier=1, diag_multiplier=1, method='dijkstra', stats=None):
+        key = (tuple(start), tuple(end), hv_multiplier, diag_multiplier, method)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            length, cells = entry
+            if not len(cells):
+                return length, []
+            rows, cols = np.divmod(cells, self.base.cols)
+            return length, list(zip(rows.tolist(), cols.tolist()))
+
+        self.misses += 1
+        graph = self.graph_for(hv_multiplier, diag_multiplier)
+        length, path = shortest_path(graph, start, end, method, stats)
+        # Paths are kept as flat int32 indices, decoded back to tuples on a hit
+        cells = np.array([r * graph.cols + c for r, c in path], dtype=index_dtype(graph.size))
+        self.entries[key] = (length, cells)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return length, path
+
+    # Apply ((row, col), weight) changes (None closes a cell, as in
+    # GridGraph.update_weights) and drop only the entries they can affect
+    def update_cells(self, changes):
+        changes = list(changes)
+        if not changes:
+            return
+        base = self.base
+        indices = np.array([base.index(cell) for cell, _ in changes], dtype=np.int64)
+        old = base.flat[indices].astype(np.float64)
+        was_blocked = np.array([base.is_blocked(index) for index in indices])
+        base.update_weights(changes)
+        new = base.flat[indices].astype(np.float64)
+        now_blocked = np.array([base.is_blocked(index) for index in indices])
+        cheaper = indices[~now_blocked & (was_blocked | (new < old))]
+        self.graphs.clear()
+
+        rows, cols = np.divmod(cheaper, base.cols)
+        scale = base.min_weight * (1 - 1e-12)
+        stale = []
+        for key, (length, cells) in self.entries.items():
+            if np.isin(indices, cells).any():
+                stale.append(key)
+                continue
+            if not len(cheaper):
+                continue
+            if length == float('inf'):
+                stale.append(key)
+                continue
+            (sr, sc), (er, ec), hv_multiplier, diag_multiplier, _ = key
+            bound = scale * (_octile_bounds(rows - sr, cols - sc, hv_multiplier, diag_multiplier)
+                             + _octile_bounds(er - rows, ec - cols, hv_multiplier, diag_multiplier))
+            if (bound < length).any():
+                stale.append(key)
+        for key in stale:
+            del self.entries[key]
+        self.invalidations += len(stale)
+
+    def clear(self):
+        self.entries.clear()
@@ -0,0 +1,125 @@
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from PathEncoding import EncodedPath
+
+
+# (col, row) vertex array of a path for plotting
+def _path_vertices(path):
+    if isinstance(path, EncodedPath):
+        rows, cols = path.cells()
+        return np.column_stack([cols, rows])
+    return np.asarray(path, dtype=float).reshape(-1, 2)[:, ::-1]
+
+
+# Show the weight of every visible cell whenever at most max_labels cells are
+# in view, and no labels otherwise; re-run as the view is zoomed or panned
+def _attach_cell_labels(ax, weights, fontsize, max_labels):
+    labels = []
+
+    def update(ax):
+        for label in labels:
+            label.remove()
+        labels.clear()
+        rows, cols = weights.shape
+        (x0, x1), (y0, y1) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+        c0, c1 = max(int(np.ceil(x0 - 0.5)), 0), min(int(np.floor(x1 + 0.5)), cols)
+        r0, r1 = max(int(np.ceil(y0 - 0.5)), 0), min(int(np.floor(y1 + 0.5)), rows)
+        if c1 <= c0 or r1 <= r0 or (r1 - r0) * (c1 - c0) > max_labels:
+            return
+        for r, row in enumerate(weights[r0:r1, c0:c1].tolist(), r0):
+            for c, weight in enumerate(row, c0):
+                labels.append(ax.text(c, r, weight, va='center', ha='center', fontsize=fontsize))
+
+    ax.callbacks.connect('xlim_changed', update)
+    ax.callbacks.connect('ylim_changed', update)
+    update(ax)
+
+
+# Draw a cost grid with routes onto ax with a fixed number of artists, so the
+# build time hardly depends on the grid size: the weights are one imshow raster
+# (weights above the 99th percentile, such as blocked sentinels, saturate),
+# all paths one LineCollection and the starts and ends one scatter each. Cell
+# borders and weight labels only appear while at most max_labels cells are in
+# view, which they are on small grids or once zoomed in. Rows run downwards
+# with cell (r, c) centred on x = c, y = r, as in visualize_grid_with_paths.
+def draw_grid_with_paths(ax, grid, starts, ends, paths, fontsize=None, max_labels=2500, cmap='YlOrBr'):
+    weights = np.asarray(grid)
+    rows, cols = weights.shape
+    finite = weights[np.isfinite(weights)] if weights.dtype.kind == 'f' else weights.reshape(-1)
+    vmin, vmax = (finite.min(), np.percentile(finite, 99)) if finite.size else (0, 1)
+    ax.imshow(weights, cmap=cmap, vmin=vmin, vmax=max(vmax, vmin + 1e-12), interpolation='nearest', alpha=0.6)
+
+    if rows * cols <= max_labels:
+        ax.set_xticks(range(cols))
+        ax.set_yticks(range(rows))
+        ax.grid(True)
+    else:
+        ax.set_xticks([])
+        ax.set_yticks([])
+    ax.set_xticklabels([])
+    ax.set_yticklabels([])
+
+    segments = [vertices for vertices in map(_path_vertices, paths) if len(vertices) > 1]
+    ax.add_collection(LineCollection(segments, colors='blue', linewidths=2))
+    if len(starts):
+        ax.scatter([c for _, c in starts], [r for r, _ in starts], color='green', label='Start', zorder=3)
+    if len(ends):
+        ax.scatter([c for _, c in ends], [r for r, _ in ends], color='red', label='End', zorder=3)
+    ax.set_xlim(-0.5, cols - 0.5)
+    ax.set_ylim(rows - 0.5, -0.5)
+    _attach_cell_labels(ax, weights, fontsize, max_labels)
+    if len(starts) or len(ends):
+        ax.legend(loc='upper right')
+
+
+# Headless route-map export on the Agg canvas, without pyplot: no display is
+# needed and nothing blocks. One figure is created up front and cleared
+# between renders, so producing thousands of sheets in a row keeps memory
+# flat. The file format follows the file name (.png, .svg, .pdf).
+class RouteRenderer:
+    def __init__(self, figsize=(8, 8), dpi=100):
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        self.renders = 0
+
+    def render(self, filename, grid, starts, ends, paths, title=None, fontsize=None, max_labels=2500):
+        ax = self.ax
+        ax.clear()
+        draw_grid_with_paths(ax, grid, starts, ends, paths, fontsize, max_labels)
+        if title is not None:
+            ax.set_title(title)
+        self.figure.savefig(filename)
+        self.renders += 1
+        return filename
+
+
+# Example Usage
+if __name__ == "__main__":
+    import math
+    import random
+    import time
+    import os
+    import tempfile
+    from RoutingSession import RoutingSession
+
+    rng = random.Random(0)
+    grid = np.array([[rng.choice([2273, 3085, 3735, 5230, 7684, 11275]) for _ in range(300)] for _ in range(300)])
+    starts = [(rng.randrange(300), rng.randrange(300)) for _ in range(50)]
+    ends = [(rng.randrange(300), rng.randrange(300)) for _ in range(50)]
+    results = RoutingSession().route_many(grid, starts, ends, 100 / 1000, math.sqrt(2 * 100**2) / 1000, 'astar')
+
+    renderer = RouteRenderer()
+    directory = tempfile.mkdtemp()
+    start_time = time.time()
+    renderer.render(os.path.join(directory, 'all_lifts.png'), grid, starts, ends, [path for _, path in results])
+    print(f"Rendered 300x300 grid with 50 routes in {time.time() - start_time} seconds")
+
+    # One sheet per lift, reusing the same figure
+    start_time = time.time()
+    for i, (start, end, (length, path)) in enumerate(zip(starts, ends, results)):
+        renderer.render(os.path.join(directory, f"lift_{i:03d}.png"), grid, [start], [end], [path],
+                        title=f"Lift {i + 1}: {length:.1f}")
+    print(f"Rendered {len(results)} lift sheets to {directory} in {time.time() - start_time} seconds")
@@ -0,0 +1,69 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+from GridGraph import GridGraph, shortest_path, shortest_paths_from
+
+
+# Content hash of a cost grid, the same whether it arrives as nested lists or an array
+def grid_fingerprint(grid):
+    weights = np.ascontiguousarray(grid)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{weights.dtype.str}{weights.shape}".encode())
+    digest.update(weights.data)
+    return digest.hexdigest()
+
+
+# Reusable routing state. Grid graphs are built once per grid fingerprint and
+# (hv_multiplier, diag_multiplier) pair and then serve every pair of a batch,
+# and later batches on the same grid, without being rebuilt.
+class RoutingSession:
+    def __init__(self, max_graphs=8):
+        self.max_graphs = max_graphs
+        self.graphs = OrderedDict()
+        self.builds = 0
+
+    def graph_for(self, grid, hv_multiplier=1, diag_multiplier=1, fingerprint=None, blocked=None, blocked_threshold=None):
+        weights = np.asarray(grid)
+        if fingerprint is None:
+            fingerprint = grid_fingerprint(weights)
+        mask_fingerprint = None if blocked is None else grid_fingerprint(np.asarray(blocked, dtype=bool))
+        key = (fingerprint, hv_multiplier, diag_multiplier, mask_fingerprint, blocked_threshold)
+        graph = self.graphs.get(key)
+        if graph is not None:
+            self.graphs.move_to_end(key)
+            return graph
+
+        # Snapshot caller-owned arrays so later in-place edits cannot desync the key
+        if weights is grid and weights.flags.writeable:
+            weights = weights.copy()
+        graph = GridGraph(weights, hv_multiplier, diag_multiplier, blocked, blocked_threshold)
+        self.graphs[key] = graph
+        self.builds += 1
+        if len(self.graphs) > self.max_graphs:
+            self.graphs.popitem(last=False)
+        return graph
+
+    def route(self, grid, start, end, hv_multiplier=1, diag_multiplier=1, method='dijkstra', stats=None,
+              blocked=None, blocked_threshold=None):
+        graph = self.graph_for(grid, hv_multiplier, diag_multiplier, blocked=blocked, blocked_threshold=blocked_threshold)
+        return shortest_path(graph, start, end, method, stats)
+
+    # Route every (start, end) pair of a batch on one shared graph. Pairs are
+    # grouped by start so each distinct start costs one one-to-many search;
+    # results come back in input order.
+    def route_many(self, grid, starts, ends, hv_multiplier=1, diag_multiplier=1, method='dijkstra', stats=None,
+                   blocked=None, blocked_threshold=None):
+        graph = self.graph_for(grid, hv_multiplier, diag_multiplier, blocked=blocked, blocked_threshold=blocked_threshold)
+        groups = OrderedDict()
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            groups.setdefault(tuple(start), []).append((i, end))
+
+        results = [None] * sum(len(pairs) for pairs in groups.values())
+        for start, pairs in groups.items():
+            ends_from_start = [end for _, end in pairs]
+            for (i, _), result in zip(pairs, shortest_paths_from(graph, start, ends_from_start, method, stats)):
+                results[i] = result
+        return results
+
+    def clear(self):
+        self.graphs.clear()
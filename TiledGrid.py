@@ -0,0 +1,257 @@
+import heapq
+import json
+import math
+import os
+from collections import OrderedDict
+import numpy as np
+from GridGraph import MOVES, octile_distance
+from GridIO import grid_metadata
+
+
+# Out-of-core cost grid stored as fixed-size square tiles, one .npy file per
+# tile (or .npz when compressed) next to an index.json holding the shape, tile
+# size, dtype, the smallest finite weight and the GridIO metadata. Only up to
+# max_tiles decoded tiles are kept in memory, least recently used first out;
+# hits, misses and evictions are counted. grid[r][c] reads a weight like the
+# nested lists the planners take, and len(grid) / len(grid[0]) give the shape.
+class TiledGrid:
+    def __init__(self, path, max_tiles=64):
+        self.path = path
+        with open(os.path.join(path, 'index.json')) as file:
+            index = json.load(file)
+        self.rows, self.cols = index['shape']
+        self.tile_size = index['tile_size']
+        self.dtype = np.dtype(index['dtype'])
+        self.compressed = index['compressed']
+        self.min_weight = index['min_weight']
+        self.metadata = grid_metadata(**index['metadata'])
+        self.tile_rows = -(-self.rows // self.tile_size)
+        self.tile_cols = -(-self.cols // self.tile_size)
+        self.max_tiles = max_tiles
+        self.tiles = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Write grid (any 2-D array, e.g. a memory-mapped GridIO file, which is read
+    # one tile at a time) as a tiled store at path and open it
+    @classmethod
+    def create(cls, path, grid, tile_size=256, compressed=False, max_tiles=64, cell_size=None, origin=(0, 0),
+               hv_multiplier=None, diag_multiplier=None, blocked_threshold=None):
+        os.makedirs(path, exist_ok=True)
+        rows, cols = grid.shape
+        min_weight = math.inf
+        for tr in range(0, rows, tile_size):
+            for tc in range(0, cols, tile_size):
+                tile = np.ascontiguousarray(grid[tr:tr + tile_size, tc:tc + tile_size])
+                finite = tile[np.isfinite(tile)] if tile.dtype.kind == 'f' else tile
+                if finite.size:
+                    min_weight = min(min_weight, finite.min().item())
+                name = os.path.join(path, cls._tile_name(tr // tile_size, tc // tile_size, compressed))
+                if compressed:
+                    np.savez_compressed(name, tile=tile)
+                else:
+                    np.save(name, tile)
+        index = {
+            'shape': [rows, cols],
+            'tile_size': tile_size,
+            'dtype': grid.dtype.str,
+            'compressed': compressed,
+            'min_weight': max(min_weight, 0) if min_weight < math.inf else 0,
+            'metadata': grid_metadata(cell_size, origin, hv_multiplier, diag_multiplier, blocked_threshold),
+        }
+        with open(os.path.join(path, 'index.json'), 'w') as file:
+            json.dump(index, file, indent=2)
+        return cls(path, max_tiles)
+
+    @staticmethod
+    def _tile_name(tr, tc, compressed):
+        return f"tile_{tr}_{tc}.npz" if compressed else f"tile_{tr}_{tc}.npy"
+
+    # Decoded tile (tr, tc), read from disk on a miss
+    def tile(self, tr, tc):
+        key = (tr, tc)
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+        self.misses += 1
+        name = os.path.join(self.path, self._tile_name(tr, tc, self.compressed))
+        if self.compressed:
+            with np.load(name) as data:
+                tile = data['tile']
+        else:
+            tile = np.load(name)
+        self.tiles[key] = tile
+        if len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+            self.evictions += 1
+        return tile
+
+    def weight(self, r, c):
+        size = self.tile_size
+        return self.tile(r // size, c // size).item(r % size, c % size)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, r):
+        if not 0 <= r < self.rows:
+            raise IndexError(f"row {r} is outside the {self.rows}x{self.cols} grid")
+        return _TiledRow(self, r)
+
+    def clear(self):
+        self.tiles.clear()
+
+
+# One row of a TiledGrid, so that grid[r][c] reads a single weight
+class _TiledRow:
+    def __init__(self, grid, r):
+        self.grid = grid
+        self.r = r
+
+    def __len__(self):
+        return self.grid.cols
+
+    def __getitem__(self, c):
+        if not 0 <= c < self.grid.cols:
+            raise IndexError(f"column {c} is outside the {self.grid.rows}x{self.grid.cols} grid")
+        return self.grid.weight(self.r, c)
+
+
+# Grid graph over a TiledGrid with the GridGraph cost model and neighbour
+# interface (index, cell, neighbors, is_blocked, path_cost), reading weights
+# through the tile cache instead of one in-memory array. Multipliers and the
+# blocked threshold default to the store's metadata; non-finite weights are
+# always blocked.
+class TiledGraph:
+    def __init__(self, store, hv_multiplier=None, diag_multiplier=None, blocked_threshold=None):
+        metadata = store.metadata
+        self.store = store
+        self.rows, self.cols = store.rows, store.cols
+        self.size = self.rows * self.cols
+        self.hv_multiplier = metadata['hv_multiplier'] if hv_multiplier is None else hv_multiplier
+        self.diag_multiplier = metadata['diag_multiplier'] if diag_multiplier is None else diag_multiplier
+        self.blocked_threshold = metadata['blocked_threshold'] if blocked_threshold is None else blocked_threshold
+        self.min_weight = store.min_weight
+        self.moves = [
+            (dr, dc, dr * self.cols + dc, self.diag_multiplier if diag else self.hv_multiplier)
+            for dr, dc, diag in MOVES
+        ]
+
+    def index(self, cell):
+        r, c = cell
+        if not (0 <= r < self.rows and 0 <= c < self.cols):
+            raise ValueError(f"cell {cell} is outside the {self.rows}x{self.cols} grid")
+        return r * self.cols + c
+
+    def cell(self, index):
+        return divmod(index, self.cols)
+
+    def _weight_blocked(self, weight):
+        return not math.isfinite(weight) or (self.blocked_threshold is not None and weight >= self.blocked_threshold)
+
+    def is_blocked(self, index):
+        return self._weight_blocked(self.store.weight(*divmod(index, self.cols)))
+
+    # Generate (neighbour index, edge cost) pairs leaving a flat cell index. A
+    # cell inside its tile reads all eight neighbours from that one tile.
+    def neighbors(self, index):
+        rows, cols, store, size = self.rows, self.cols, self.store, self.store.tile_size
+        r, c = divmod(index, cols)
+        tile = store.tile(r // size, c // size)
+        lr, lc = r % size, c % size
+        inside = 0 < lr < tile.shape[0] - 1 and 0 < lc < tile.shape[1] - 1
+        for dr, dc, offset, multiplier in self.moves:
+            nr, nc = r + dr, c + dc
+            if inside:
+                weight = tile.item(lr + dr, lc + dc)
+            elif 0 <= nr < rows and 0 <= nc < cols:
+                weight = store.weight(nr, nc)
+            else:
+                continue
+            if not self._weight_blocked(weight):
+                yield index + offset, weight * multiplier
+
+    # Cost of a cell path, summed move by move like GridGraph.path_cost
+    def path_cost(self, path):
+        cost = 0
+        for (r1, c1), (r2, c2) in zip(path, path[1:]):
+            multiplier = self.diag_multiplier if r1 != r2 and c1 != c2 else self.hv_multiplier
+            cost += self.store.weight(r2, c2) * multiplier
+        return cost
+
+
+# A* over a TiledGraph with the octile heuristic. The search state lives in
+# dicts holding only the cells reached, so neither it nor the grid has to fit
+# in memory whole; tiles stream through the cache as the frontier moves. When
+# a stats dict is passed, expanded cells and the tile cache hits and misses of
+# this search are added to it.
+def tiled_astar_shortest_path(graph, start, end, stats=None):
+    store = graph.store
+    hits, misses = store.hits, store.misses
+    source, target = graph.index(start), graph.index(end)
+    length, path, expanded = float('inf'), [], 0
+    if not graph.is_blocked(source) and not graph.is_blocked(target):
+        cols = graph.cols
+        tr, tc = divmod(target, cols)
+        hv, diag = graph.hv_multiplier, graph.diag_multiplier
+        scale = graph.min_weight * (1 - 1e-12)
+        dist = {source: 0}
+        parent = {source: None}
+        closed = set()
+        heap = [(0, 0, source)]
+        while heap:
+            _, d, u = heapq.heappop(heap)
+            if u in closed:
+                continue
+            closed.add(u)
+            expanded += 1
+            if u == target:
+                break
+            for v, cost in graph.neighbors(u):
+                nd = d + cost
+                if v not in closed and nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    parent[v] = u
+                    r, c = divmod(v, cols)
+                    heapq.heappush(heap, (nd + scale * octile_distance(r - tr, c - tc, hv, diag), nd, v))
+        if target in closed:
+            node = target
+            while node is not None:
+                path.append(graph.cell(node))
+                node = parent[node]
+            path.reverse()
+            length = graph.path_cost(path)
+    if stats is not None:
+        stats['expanded'] = stats.get('expanded', 0) + expanded
+        stats['tile_hits'] = stats.get('tile_hits', 0) + store.hits - hits
+        stats['tile_misses'] = stats.get('tile_misses', 0) + store.misses - misses
+    return length, path
+
+
+# Example Usage
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    weights = np.array([2273, 3085, 3735, 5230, 7684, 11275], dtype=np.int32)
+    grid = weights[np.random.default_rng(0).integers(0, len(weights), size=(3000, 3000))]
+    grid[1400:1600, 1480:1520] = 1000000
+    path = os.path.join(tempfile.mkdtemp(), 'yard.tiles')
+    store = TiledGrid.create(path, grid, tile_size=128, max_tiles=64, cell_size=100, blocked_threshold=1000000)
+    print(f"grid[5][7] = {store[5][7]}, {len(store)}x{len(store[0])} cells in {store.tile_rows}x{store.tile_cols} tiles")
+
+    graph = TiledGraph(store)
+    stats = {}
+    start_time = time.time()
+    length, route = tiled_astar_shortest_path(graph, (1500, 1350), (1500, 1650), stats)
+    print(f"Length {length}, {len(route)} cells, {time.time() - start_time} seconds, expanded {stats['expanded']}")
+    print(f"Tile cache: {stats['tile_hits']} hits, {stats['tile_misses']} misses, hit rate {store.hit_rate:.4f}, "
+          f"{store.evictions} evictions")
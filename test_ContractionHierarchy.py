@@ -0,0 +1,120 @@
+import math
+import numpy as np
+import pytest
+from ContractionHierarchy import ContractionHierarchy
+from GridGraph import GridGraph, dijkstra_shortest_path
+
+BLOCKED = 1000000
+
+
+# Random cost grid with about blocked_share of its cells at the blocked weight
+def random_graph(seed, rows, cols, blocked_share=0.25):
+    rng = np.random.default_rng(seed)
+    grid = rng.choice([2273, 3085, 3735, 5230, 7684, 11275], size=(rows, cols))
+    grid[rng.random((rows, cols)) < blocked_share] = BLOCKED
+    return GridGraph(grid, 100 / 1000, math.sqrt(2 * 100**2) / 1000, blocked_threshold=BLOCKED)
+
+
+def open_cells(graph):
+    return [graph.cell(index) for index in range(graph.size) if not graph.is_blocked(index)]
+
+
+# route() must give the Dijkstra length and a connected path of that cost
+def check_route(hierarchy, graph, start, end):
+    expected, _ = dijkstra_shortest_path(graph, start, end)
+    length, path = hierarchy.route(start, end)
+    if expected == float('inf'):
+        assert (length, path) == (float('inf'), [])
+        return
+    assert length == pytest.approx(expected, rel=1e-12)
+    assert path[0] == start and path[-1] == end
+    assert all(max(abs(r1 - r2), abs(c1 - c2)) == 1 for (r1, c1), (r2, c2) in zip(path, path[1:]))
+    assert not any(graph.is_blocked(graph.index(cell)) for cell in path)
+    assert graph.path_cost(path) == pytest.approx(length, rel=1e-12)
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_route_matches_dijkstra_on_random_blocked_grids(seed):
+    rng = np.random.default_rng(100 + seed)
+    graph = random_graph(seed, int(rng.integers(4, 16)), int(rng.integers(4, 16)), rng.uniform(0, 0.4))
+    hierarchy = ContractionHierarchy.build(graph)
+    cells = open_cells(graph)
+    for _ in range(20):
+        start = cells[rng.integers(len(cells))]
+        end = cells[rng.integers(len(cells))]
+        check_route(hierarchy, graph, start, end)
+
+
+def test_small_witness_limit_keeps_routes_exact():
+    graph = random_graph(11, 12, 12)
+    hierarchy = ContractionHierarchy.build(graph, witness_limit=2)
+    cells = open_cells(graph)
+    for start, end in zip(cells[::3], cells[::-5]):
+        check_route(hierarchy, graph, start, end)
+
+
+def test_start_equals_end():
+    graph = random_graph(3, 8, 8, 0)
+    length, path = ContractionHierarchy.build(graph).route((4, 4), (4, 4))
+    assert (length, path) == (0, [(4, 4)])
+
+
+def test_save_load_round_trip(tmp_path):
+    graph = random_graph(5, 10, 12)
+    hierarchy = ContractionHierarchy.build(graph)
+    index_path = str(tmp_path / 'yard.ch.npz')
+    hierarchy.save(index_path)
+    loaded = ContractionHierarchy.load(graph, index_path)
+    assert np.array_equal(loaded.rank, hierarchy.rank)
+    for saved, read in zip(hierarchy.up + hierarchy.down, loaded.up + loaded.down):
+        assert np.array_equal(saved, read)
+    cells = open_cells(graph)
+    for start, end in zip(cells[::4], cells[::-3]):
+        assert loaded.route(start, end) == hierarchy.route(start, end)
+
+
+def test_load_rejects_other_grid_or_cost_model(tmp_path):
+    graph = random_graph(5, 10, 12)
+    index_path = str(tmp_path / 'yard.ch.npz')
+    ContractionHierarchy.build(graph).save(index_path)
+    with pytest.raises(ValueError):
+        ContractionHierarchy.load(random_graph(6, 10, 12), index_path)
+    with pytest.raises(ValueError):
+        ContractionHierarchy.load(GridGraph(graph.weights, 1, math.sqrt(2), blocked_threshold=BLOCKED), index_path)
+
+
+# End walled off from the start by a blocked column
+def test_unreachable_end():
+    grid = np.full((6, 7), 3085)
+    grid[:, 3] = BLOCKED
+    graph = GridGraph(grid, 100 / 1000, math.sqrt(2 * 100**2) / 1000, blocked_threshold=BLOCKED)
+    hierarchy = ContractionHierarchy.build(graph)
+    assert hierarchy.route((0, 0), (5, 6)) == (float('inf'), [])
+    assert hierarchy.route((5, 6), (0, 0)) == (float('inf'), [])
+    check_route(hierarchy, graph, (0, 0), (5, 2))
+
+
+def test_blocked_endpoints():
+    grid = np.full((6, 6), 3085)
+    grid[2, 2] = BLOCKED
+    graph = GridGraph(grid, 100 / 1000, math.sqrt(2 * 100**2) / 1000, blocked_threshold=BLOCKED)
+    hierarchy = ContractionHierarchy.build(graph)
+    assert hierarchy.route((2, 2), (5, 5)) == (float('inf'), [])
+    assert hierarchy.route((0, 0), (2, 2)) == (float('inf'), [])
+    assert hierarchy.route((2, 2), (2, 2)) == (float('inf'), [])
+
+
+def test_endpoint_outside_grid():
+    graph = random_graph(1, 5, 5, 0)
+    with pytest.raises(ValueError):
+        ContractionHierarchy.build(graph).route((0, 0), (5, 0))
+
+
+# Queries from one start reuse its upward search
+def test_many_ends_from_one_start():
+    graph = random_graph(7, 14, 14)
+    hierarchy = ContractionHierarchy.build(graph)
+    cells = open_cells(graph)
+    for end in cells[::2]:
+        check_route(hierarchy, graph, cells[0], end)
+    check_route(hierarchy, graph, cells[1], cells[0])
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from GridGraph import GridGraph
+from MultiCranePlanning import find_conflicts, plan_cranes
+
+
+def plan_paths(graph, starts, ends):
+    return [path for _, path in plan_cranes(graph, starts, ends)]
+
+
+# Crane 0 cannot pass crane 2 in the single lane, so it stays on (0, 3); crane 1
+# must not be routed through it
+def test_unplanned_crane_stays_parked_on_its_start():
+    graph = GridGraph(np.ones((1, 5), dtype=int))
+    starts, ends = [(0, 3), (0, 2), (0, 1)], [(0, 1), (0, 3), (0, 2)]
+    paths = plan_paths(graph, starts, ends)
+    assert paths[0] == []
+    assert all((0, 3) not in path for path in paths[1:])
+    assert find_conflicts(paths, starts) == []
+
+
+def test_find_conflicts_counts_unplanned_cranes_at_their_start():
+    paths = [[], [(0, 2), (0, 3)]]
+    assert find_conflicts(paths) == []
+    assert find_conflicts(paths, [(0, 3), (0, 2)]) == [(1, 0, 1)]
+
+
+def test_narrow_yard_moves_are_keyed_by_row_and_column():
+    graph = GridGraph(np.ones((6, 2), dtype=int) * 5)
+    starts, ends = [(0, 0), (5, 1)], [(5, 0), (0, 1)]
+    results = plan_cranes(graph, starts, ends)
+    assert [path[-1] for _, path in results] == ends
+    assert find_conflicts([path for _, path in results], starts) == []
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_random_small_yards_are_conflict_free(seed):
+    rng = np.random.default_rng(seed)
+    rows, cols = int(rng.integers(1, 6)), int(rng.integers(1, 6))
+    grid = rng.integers(1, 9, size=(rows, cols))
+    grid[rng.random((rows, cols)) < 0.2] = 100
+    graph = GridGraph(grid, blocked_threshold=100)
+    cells = [graph.cell(index) for index in range(graph.size) if not graph.is_blocked(index)]
+    count = min(len(cells) // 2, 4)
+    chosen = rng.permutation(len(cells))
+    starts = [cells[i] for i in chosen[:count]]
+    ends = [cells[i] for i in chosen[count:2 * count]]
+    results = plan_cranes(graph, starts, ends)
+    paths = [path for _, path in results]
+    assert find_conflicts(paths, starts) == []
+    for (length, path), start, end in zip(results, starts, ends):
+        if path:
+            assert path[0] == start and path[-1] == end